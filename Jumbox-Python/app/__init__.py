@@ -5,26 +5,87 @@ from dotenv import load_dotenv
 
 bcrypt = Bcrypt()
 
-def create_app():
+def create_app(config=None):
     load_dotenv()
 
     app = Flask(__name__, static_folder='../static')
     app.secret_key = os.environ.get("FLASK_SECRET_KEY", "clave_secreta_super_segura")
     app.config["DB_NAME"] = "jumbox.db"
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", 8))
+    app.config["DB_POOL_RO_SIZE"] = int(os.environ.get("DB_POOL_RO_SIZE", 16))
+    app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", 100))
+    app.config["SLOW_QUERY_LOG"] = os.environ.get("SLOW_QUERY_LOG")
+    # Cada cuántos segundos se rearma el índice de sugerencias (cambios de otros workers)
+    app.config["SUGERENCIAS_TTL"] = float(os.environ.get("SUGERENCIAS_TTL", 300))
+    app.config["CATALOG_CACHE_SIZE"] = int(os.environ.get("CATALOG_CACHE_SIZE", 512))
+    # Cada cuánto se releen los contadores de cambios escritos por otros workers
+    app.config["CACHE_COUNTERS_TTL"] = float(os.environ.get("CACHE_COUNTERS_TTL", 1.0))
+    # Respuestas más chicas que esto (bytes) no se comprimen
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    # Tope (en caracteres) del HTML de tarjetas cacheado con {% cache %}; 0 lo apaga
+    app.config["FRAGMENT_CACHE_SIZE"] = int(os.environ.get("FRAGMENT_CACHE_SIZE", 8 * 1024 * 1024))
+    # Hasta cuántas unidades el catálogo muestra "últimas unidades"
+    app.config["STOCK_BAJO"] = int(os.environ.get("STOCK_BAJO", 5))
+    app.config["TEMPLATE_CACHE_DIR"] = os.environ.get("TEMPLATE_CACHE_DIR")
+    # Compila los templates al crear la app (y falla si falta alguno)
+    app.config["TEMPLATE_PRECOMPILE"] = os.environ.get("TEMPLATE_PRECOMPILE", "1") != "0"
+    app.config["IMAGE_STORE_DIR"] = os.environ.get("IMAGE_STORE_DIR")
+    # "x-sendfile" (Apache/lighttpd) o "x-accel-redirect" (nginx, con IMAGE_SENDFILE_PREFIX)
+    app.config["IMAGE_SENDFILE"] = os.environ.get("IMAGE_SENDFILE")
+    app.config["IMAGE_SENDFILE_PREFIX"] = os.environ.get("IMAGE_SENDFILE_PREFIX", "/imagenes-store/")
+    # /metrics está apagado; prendido lo ven los admin y las IP de METRICS_ALLOWED_IPS (separadas por coma)
+    app.config["METRICS_ENDPOINT"] = os.environ.get("METRICS_ENDPOINT", "0") == "1"
+    app.config["METRICS_ALLOWED_IPS"] = [ip.strip() for ip in os.environ.get("METRICS_ALLOWED_IPS", "").split(",")
+                                         if ip.strip()]
+    if config:
+        app.config.update(config)
 
     bcrypt.init_app(app)
 
+    from . import db, migrations, images, search, cache, stock, fragments
+    migrations.init_app(app)
+    db.init_app(app)
+    cache.init_app(app)
+    stock.init_app(app)
+    fragments.init_app(app)
+    images.init_app(app)
+    search.init_app(app)
+
+    # Primero: su after_request corre último y comprime la respuesta final.
+    from . import compression, assets
+    compression.init_app(app)
+    assets.init_app(app)
+
+    if app.config.get("METRICS_ENABLED", True):
+        from . import metrics
+        metrics.init_app(app)
+
+    from . import slowlog
+    slowlog.init_app(app)
+
+    from . import sqlbudget
+    sqlbudget.init_app(app)
+
     # Registrar blueprints
     from .main.routes import main_bp
     from .auth.routes import auth_bp
     from .user.routes import user_bp
     from .sucursal.routes import sucursal_bp
     from .admin.routes import admin_bp
+    from .api.routes import api_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(sucursal_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+
+    from . import templating, conditional
+    templating.init_app(app)
+    conditional.init_app(app)
+
+    from . import commands
+    commands.init_app(app)
 
     return app
\ No newline at end of file
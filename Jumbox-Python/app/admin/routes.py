@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.utils import (get_conn, require_login_redirect, listar_categorias, allowed_file)
+from app.images import image_store, save_variants
+from app.search import suggestion_index
+from app.stock import stock_ledger, stock_version
 
 admin_bp = Blueprint('admin', __name__, template_folder='../../templates/admin')
 
@@ -11,7 +14,7 @@ def admin():
     if session.get('tipo') != 'admin':
         flash("No autorizado.", "error")
         return redirect(url_for('main.home'))
-    return render_template('admin.html')
+    return render_template('admin/admin.html')
 
 @admin_bp.route('/admin/solicitudes')
 def admin_solicitudes():
@@ -41,7 +44,7 @@ def admin_solicitudes():
             ORDER BY pr.id_pedido_reposicion DESC
         """).fetchall()
     
-    return render_template('admin_solicitudes.html', solicitudes=solicitudes)
+    return render_template('admin/admin_solicitudes.html', solicitudes=solicitudes)
 
 @admin_bp.route('/admin/solicitudes/aprobar/<int:solicitud_id>', methods=['POST'])
 def admin_aprobar_solicitud(solicitud_id):
@@ -94,6 +97,7 @@ def admin_aprobar_solicitud(solicitud_id):
                 ON CONFLICT(fk_sucursal, fk_producto) 
                 DO UPDATE SET cantidad = cantidad + ?
             """, (cliente_sucursal_id, producto_id, cantidad, cantidad))
+            version = stock_version(conn, cliente_sucursal_id)
             
             conn.execute("""
                 DELETE FROM detalle_pedido_reposicion 
@@ -106,6 +110,7 @@ def admin_aprobar_solicitud(solicitud_id):
             """, (solicitud_id,))
             
             conn.commit()
+            stock_ledger().apply(cliente_sucursal_id, {producto_id: cantidad}, version, 1)
             flash("Productos enviados correctamente", "success")
             
         except Exception as e:
@@ -162,7 +167,7 @@ def admin_estadisticas():
             LIMIT 5
         """).fetchall()
     
-    return render_template('admin_estadisticas.html', 
+    return render_template('admin/admin_estadisticas.html', 
                         estadisticas_sucursales=estadisticas_sucursales,
                         estadisticas_totales=estadisticas_totales,
                         productos_mas_vendidos=productos_mas_vendidos)
@@ -208,11 +213,15 @@ def crear_producto():
 
             fk_categoria = cat_row['id_categoria']
 
-            conn.execute("""
-                INSERT INTO producto (nombre, precio, stock, fk_categoria, imagen)
+            imagen_hash = image_store().put(imagen_data) if imagen_data else None
+            cursor = conn.execute("""
+                INSERT INTO producto (nombre, precio, stock, fk_categoria, imagen_hash)
                 VALUES (?, ?, ?, ?, ?)
-            """, (nombre, precio, stock, fk_categoria, imagen_data))
+            """, (nombre, precio, stock, fk_categoria, imagen_hash))
+            if imagen_data:
+                save_variants(conn, cursor.lastrowid, imagen_data)
             conn.commit()
+        suggestion_index().update('producto', cursor.lastrowid, nombre)
 
         flash('Producto creado exitosamente', 'success')
         return redirect(url_for('main.home'))
@@ -220,7 +229,7 @@ def crear_producto():
     with get_conn() as conn:
         categorias = listar_categorias(conn)
 
-    return render_template('crear_producto.html', categorias=categorias)
+    return render_template('admin/crear_producto.html', categorias=categorias)
 
 @admin_bp.route('/editar-productos')
 def listar_productos_para_editar():
@@ -230,7 +239,7 @@ def listar_productos_para_editar():
     
     with get_conn() as conn:
         productos = conn.execute("SELECT id_producto, nombre, precio, stock FROM producto").fetchall()
-    return render_template('listar_productos.html', productos=productos)
+    return render_template('admin/listar_productos.html', productos=productos)
 
 @admin_bp.route('/editar-producto/<int:id_producto>', methods=['GET', 'POST'])
 def editar_producto(id_producto):
@@ -290,9 +299,10 @@ def editar_producto(id_producto):
             if imagen_data:
                 conn.execute("""
                     UPDATE producto
-                    SET nombre = ?, precio = ?, stock = ?, fk_categoria = ?, imagen = ?
+                    SET nombre = ?, precio = ?, stock = ?, fk_categoria = ?, imagen = NULL, imagen_hash = ?
                     WHERE id_producto = ?
-                """, (nombre, precio, stock, fk_categoria, imagen_data, id_producto))
+                """, (nombre, precio, stock, fk_categoria, image_store().put(imagen_data), id_producto))
+                save_variants(conn, id_producto, imagen_data)
             else:
                 conn.execute("""
                     UPDATE producto
@@ -301,11 +311,12 @@ def editar_producto(id_producto):
                 """, (nombre, precio, stock, fk_categoria, id_producto))
 
             conn.commit()
+        suggestion_index().update('producto', id_producto, nombre)
 
         flash('Producto actualizado correctamente', 'success')
         return redirect(url_for('main.home'))
 
-    return render_template('editar_producto.html', categorias=categorias, producto=producto)
+    return render_template('admin/editar_producto.html', categorias=categorias, producto=producto)
 
 @admin_bp.post('/productos/editar')
 def productos_editar():
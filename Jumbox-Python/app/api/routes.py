@@ -0,0 +1,112 @@
+import json
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context, url_for
+
+from app.queries import CatalogQuery
+from app.utils import get_conn, listar_sucursales
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Campos que se pueden pedir con ?campos=; sin el parámetro van todos.
+CAMPOS = ("id", "nombre", "precio", "stock", "categoria", "imagen", "version", "actualizado")
+# Bytes que se juntan antes de mandar un pedazo de la respuesta.
+TANDA_BYTES = 64 * 1024
+
+
+def _dumps(valor):
+    if orjson is not None:
+        return orjson.dumps(valor)
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _error(mensaje):
+    return jsonify(error=mensaje), 400
+
+
+def _instante(texto):
+    """?since= (ISO 8601) en el mismo formato que producto.actualizado."""
+    instante = datetime.fromisoformat(texto.replace("Z", "+00:00"))
+    if instante.tzinfo is None:
+        instante = instante.replace(tzinfo=timezone.utc)
+    return instante.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+@api_bp.get('/productos')
+def productos():
+    """Catálogo con el stock de una sucursal, en JSON que se manda fila por
+    fila a medida que se leen del cursor (sirve para exportar todo).
+
+    Parámetros: sucursal, campos (id,nombre,...), since (ISO 8601),
+    despues (cursor: id del último producto recibido) y limite. Con limite
+    la respuesta trae "siguiente", el cursor de la página siguiente.
+    """
+    campos = request.args.get('campos')
+    campos = [c.strip() for c in campos.split(',') if c.strip()] if campos else list(CAMPOS)
+    desconocidos = [c for c in campos if c not in CAMPOS]
+    if desconocidos:
+        return _error(f"Campos desconocidos: {', '.join(desconocidos)}. Válidos: {', '.join(CAMPOS)}.")
+
+    since = request.args.get('since')
+    if since:
+        try:
+            since = _instante(since)
+        except ValueError:
+            return _error("since tiene que ser una fecha ISO 8601, por ejemplo 2024-05-01T00:00:00Z.")
+
+    despues = request.args.get('despues', type=int)
+    limite = request.args.get('limite', type=int)
+    if limite is not None and limite < 1:
+        return _error("limite tiene que ser mayor que 0.")
+
+    conn = get_conn()
+    sucursal_id = request.args.get('sucursal', type=int) or session.get('cliente_sucursal_id')
+    if sucursal_id is None:
+        sucursales = listar_sucursales(conn)
+        sucursal_id = sucursales[0]['id'] if sucursales else None
+
+    # Se pide uno de más para saber si hay otra página.
+    consulta = (CatalogQuery(sucursal_id, imagen=True)
+                .desde(since)
+                .despues(despues)
+                .paginar(limite + 1 if limite else None))
+
+    def fila_json(fila):
+        valores = {}
+        for campo in campos:
+            if campo == "imagen":
+                valores[campo] = (url_for('main.producto_imagen', id_producto=fila['id'],
+                                          v=fila['imagen_version'])
+                                  if fila['imagen_version'] else None)
+            else:
+                valores[campo] = fila[campo]
+        return _dumps(valores)
+
+    def generar():
+        partes = [b'{"sucursal":' + _dumps(sucursal_id) + b',"productos":[']
+        tamanio = 0
+        enviados = 0
+        ultimo = None
+        hay_mas = False
+        for fila in consulta.iter(conn):
+            if limite and enviados == limite:
+                hay_mas = True
+                break
+            json_fila = fila_json(fila)
+            partes.append(json_fila if enviados == 0 else b"," + json_fila)
+            tamanio += len(json_fila) + 1
+            enviados += 1
+            ultimo = fila['id']
+            if tamanio >= TANDA_BYTES:
+                yield b"".join(partes)
+                partes, tamanio = [], 0
+        siguiente = ultimo if hay_mas else None
+        partes.append(b'],"siguiente":' + _dumps(siguiente) + b'}')
+        yield b"".join(partes)
+
+    return Response(stream_with_context(generar()), mimetype='application/json')
@@ -0,0 +1,76 @@
+import hashlib
+import os
+
+from flask import current_app
+
+from app.compression import SUFIJOS, send_static
+from app.images import CACHE_SEGUNDOS
+
+
+class StaticManifest:
+    """Nombre de cada archivo de static -> nombre con el hash de su contenido
+    (style.css -> style.1a2b3c4d5e6f.css).
+
+    url_for('static', ...) devuelve el nombre con hash, que cambia cuando
+    cambia el archivo; por eso se puede cachear como inmutable por un año.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.archivos = {}
+        self.originales = {}
+
+    def build(self):
+        for raiz, _, archivos in os.walk(self.carpeta):
+            for nombre in archivos:
+                # Los precomprimidos se sirven a través de su original.
+                if nombre.startswith(".") or nombre.endswith(tuple(SUFIJOS.values())):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                with open(ruta, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                relativo = os.path.relpath(ruta, self.carpeta).replace(os.sep, "/")
+                base, extension = os.path.splitext(relativo)
+                con_hash = f"{base}.{digest}{extension}"
+                self.archivos[relativo] = con_hash
+                self.originales[con_hash] = relativo
+        return self
+
+    def url_name(self, filename):
+        return self.archivos.get(filename, filename)
+
+    def original(self, filename):
+        """Nombre real de un nombre con hash, o None si no es uno."""
+        return self.originales.get(filename)
+
+
+def static_manifest(app=None):
+    return (app or current_app).extensions["static_manifest"]
+
+
+def _url_defaults(endpoint, values):
+    if endpoint == "static" and "filename" in values:
+        values["filename"] = static_manifest().url_name(values["filename"])
+
+
+def static_view(filename):
+    """Vista static: los nombres con hash se cachean un año como inmutables;
+    los demás se sirven como siempre."""
+    original = static_manifest().original(filename)
+    if original is None:
+        return send_static(filename)
+    resp = send_static(original, CACHE_SEGUNDOS)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+def init_app(app):
+    """Arma el manifiesto de static al arrancar (STATIC_FINGERPRINT, apagado
+    por defecto en debug para ver los cambios de CSS sin reiniciar). Va después
+    de compression.init_app."""
+    if not app.static_folder or not app.config.get("STATIC_FINGERPRINT", not app.debug):
+        return
+    app.extensions["static_manifest"] = StaticManifest(app.static_folder).build()
+    app.url_defaults(_url_defaults)
+    app.view_functions["static"] = static_view
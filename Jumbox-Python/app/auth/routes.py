@@ -43,27 +43,27 @@ def registro():
 
         if contra != confirmar:
             flash('Las contraseñas no coinciden', 'error')
-            return render_template('registro.html', nombre=nombre, tel=tel, direccion=direccion)
+            return render_template('auth/registro.html', nombre=nombre, tel=tel, direccion=direccion)
 
         hash_contra = bcrypt.generate_password_hash(contra).decode('utf-8')
 
+        conn = get_conn()
         try:
-            conn = sqlite3.connect("jumbox.db")
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO cliente (nombre, direccion, telefono, contrasena, tipo)
                 VALUES (?, ?, ?, ?, 'usuario')
             """, (nombre, direccion, tel, hash_contra))
             conn.commit()
-            conn.close()
 
             flash("Registro exitoso", "success")
             return redirect(url_for('auth.login'))
         except sqlite3.IntegrityError:
+            conn.rollback()
             flash("El telefono ya está registrado", "error")
             return redirect(url_for('auth.registro'))
 
-    return render_template('registro.html')
+    return render_template('auth/registro.html')
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -71,7 +71,7 @@ def login():
         tel = request.form['tel']
         contra = request.form['contra']
 
-        conn = sqlite3.connect("jumbox.db")
+        conn = get_conn()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id_cliente, nombre, contrasena, tipo
@@ -79,7 +79,6 @@ def login():
             WHERE telefono = ?
         """, (tel,))
         cliente = cursor.fetchone()
-        conn.close()
 
         if cliente and bcrypt.check_password_hash(cliente[2], contra):
             session['id_cliente'] = cliente[0]
@@ -96,9 +95,9 @@ def login():
                 return redirect(url_for('main.home'))
 
         flash("Credenciales incorrectas", "error")
-        return render_template('login.html', tel=tel)
+        return render_template('auth/login.html', tel=tel)
 
-    return render_template('login.html')
+    return render_template('auth/login.html')
 
 @auth_bp.route("/logingoogle")
 def logingoogle():
@@ -126,7 +125,7 @@ def callback():
         session["nombre_google"] = nombre_google
         return redirect(url_for("auth.pedir_telefono"))
 
-    conn = sqlite3.connect("jumbox.db")
+    conn = get_conn(write=True)
     cursor = conn.cursor()
 
     cursor.execute("SELECT * FROM cliente WHERE telefono = ?", (phone_number,))
@@ -141,8 +140,6 @@ def callback():
         cursor.execute("SELECT * FROM cliente WHERE telefono = ?", (phone_number,))
         cliente = cursor.fetchone()
 
-    conn.close()
-
     session["id_cliente"] = cliente[0]
     session["nombre"] = cliente[1]
     session["tipo"] = cliente[3]
@@ -161,7 +158,7 @@ def pedir_telefono():
             flash("Error: sesión de Google no válida.", "error")
             return redirect(url_for("auth.login"))
 
-        conn = sqlite3.connect("jumbox.db")
+        conn = get_conn()
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM cliente WHERE telefono = ?", (telefono,))
@@ -170,7 +167,6 @@ def pedir_telefono():
         if cliente:
             nombre_existente = cliente[1]
             if nombre_existente != nombre_google:
-                conn.close()
                 flash("El número de teléfono ya está asociado a otra cuenta. Las credenciales no coinciden.", "error")
                 return redirect(url_for("auth.login"))
         else:
@@ -182,8 +178,6 @@ def pedir_telefono():
             cursor.execute("SELECT * FROM cliente WHERE telefono = ?", (telefono,))
             cliente = cursor.fetchone()
 
-        conn.close()
-
         session["id_cliente"] = cliente[0]
         session["nombre"] = cliente[1]
         session["tipo"] = cliente[3]
@@ -191,7 +185,7 @@ def pedir_telefono():
         flash("Inicio de sesión exitoso", "success")
         return redirect(url_for("main.home"))
 
-    return render_template("pedir_telefono.html")
+    return render_template("auth/pedir_telefono.html")
 
 @auth_bp.route('/logout')
 def logout():
@@ -0,0 +1,248 @@
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import time
+
+from flask import has_request_context
+
+from app.db import add_sql_listener
+from app.images import ImageStore
+from app.synthetic import TELEFONO_BASE, generate
+
+# (nombre, método, url, rol que hace el request)
+ROUTES = [
+    ("home", "GET", "/", "usuario"),
+    ("home_busqueda", "GET", "/?q=leche", "usuario"),
+    ("home_categoria", "GET", "/?categoria=Almacén", "usuario"),
+    ("producto_imagen", "GET", "/producto/1/imagen", "usuario"),
+    ("carrito", "GET", "/carrito", "usuario"),
+    ("checkout", "POST", "/carrito/checkout", "usuario"),
+    ("mis_compras", "GET", "/mis-compras", "usuario"),
+    ("sucursal_pedidos_clientes", "GET", "/sucursal/pedidos-clientes", "sucursal"),
+    ("admin_solicitudes", "GET", "/admin/solicitudes", "admin"),
+    ("admin_estadisticas", "GET", "/admin/estadisticas", "admin"),
+]
+
+# generate() numera: admin = 1, sucursales desde 2 y después los clientes;
+# con 5 sucursales el primer cliente es el 7.
+CREDENCIALES = {
+    "usuario": (TELEFONO_BASE + 7, "Usuario1234"),
+    "sucursal": (TELEFONO_BASE + 2, "Sucursal1111"),
+    "admin": (12345678, "Admin1234"),
+}
+
+
+def scale_counts(productos):
+    """Cantidades de cada tabla para una escala, proporcionales a los productos."""
+    return {
+        "productos": productos,
+        "sucursales": 5,
+        "clientes": max(productos // 2, 100),
+        "carritos": max(productos // 10, 10),
+        "pedidos": productos * 10,
+        "reposiciones": max(productos // 10, 10),
+    }
+
+
+def percentile(valores, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not valores:
+        return None
+    k = max(0, min(len(valores) - 1, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[k]
+
+
+class _SQLCounter:
+    """Cuenta las sentencias de los requests con el mismo hook que
+    @sql_budget (sin BEGIN/COMMIT ni las sentencias de los triggers)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, sql, params, segundos):
+        if has_request_context():
+            self.total += 1
+
+
+def _vaciar_caches(app):
+    """Deja los caches en memoria (catálogo, referencia, fragmentos) vacíos y
+    los contadores vencidos, como en un worker recién arrancado."""
+    for cache in app.extensions.get("caches", {}).values():
+        cache.clear()
+    app.extensions["version_counters"].mark_stale()
+
+
+def _image_dir(directorio):
+    """Store de imágenes de las bases del benchmark, compartido entre escalas."""
+    return os.path.join(directorio, "imagenes")
+
+
+def _dataset(directorio, productos, seed, passwords, log):
+    """Base sintética de la escala, generada una vez y reutilizada entre corridas."""
+    ruta = os.path.join(directorio, f"bench-{productos}-s{seed}.db")
+    if not os.path.exists(ruta):
+        log(f"Generando {ruta}...")
+        generate(ruta + ".tmp", scale_counts(productos), seed=seed, passwords=passwords,
+                 log=lambda *_: None, store=ImageStore(_image_dir(directorio)))
+        os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+def _login(client, rol):
+    telefono, contra = CREDENCIALES[rol]
+    client.post("/login", data={"tel": str(telefono), "contra": contra})
+    return client
+
+
+def run_scale(create_app, db_name, repeticiones=30, calentamiento=3, image_dir=None):
+    """Mide cada ruta de ROUTES contra una base y devuelve sus métricas: con
+    los caches calientes y, en "frio", vaciándolos antes de cada request."""
+    contador = _SQLCounter()
+    config = {"DB_NAME": db_name}
+    if image_dir:
+        config["IMAGE_STORE_DIR"] = image_dir
+    app = create_app(config)
+    add_sql_listener(app, contador)
+    clientes = {rol: _login(app.test_client(), rol) for rol in CREDENCIALES}
+    clientes["usuario"].get("/")   # fija la sucursal del cliente en la sesión
+
+    # Producto con más stock en la sucursal del cliente, para poder comprar en cada vuelta.
+    conn = sqlite3.connect(db_name)
+    fila = conn.execute("""
+        SELECT fk_producto FROM almacen_sucursal
+        WHERE fk_sucursal = (SELECT MIN(id_cliente) FROM cliente WHERE tipo = 'sucursal')
+        ORDER BY cantidad DESC LIMIT 1
+    """).fetchone()
+    conn.close()
+    producto_id = fila[0] if fila else 1
+
+    def medir(nombre, metodo, url, client, frio):
+        tiempos, sqls, tamanios, estados = [], [], [], set()
+        for vuelta in range(calentamiento + repeticiones):
+            if nombre == "checkout":
+                client.post("/carrito/items/update", data={"producto_id": producto_id, "cantidad": 1})
+                datos = {"metodo_pago": "EFECTIVO"}
+            else:
+                datos = None
+            if frio:
+                _vaciar_caches(app)
+            sql_antes = contador.total
+            inicio = time.perf_counter()
+            resp = client.open(url, method=metodo, data=datos)
+            duracion = time.perf_counter() - inicio
+            if vuelta < calentamiento:
+                continue
+            tiempos.append(duracion * 1000)
+            sqls.append(contador.total - sql_antes)
+            tamanios.append(len(resp.get_data()))
+            estados.add(resp.status_code)
+        tiempos.sort()
+        return {
+            "p50_ms": round(percentile(tiempos, 50), 3),
+            "p95_ms": round(percentile(tiempos, 95), 3),
+            "p99_ms": round(percentile(tiempos, 99), 3),
+            "sql": max(sqls),
+            "bytes": max(tamanios),
+            "status": sorted(estados),
+        }
+
+    resultados = {}
+    for nombre, metodo, url, rol in ROUTES:
+        client = clientes[rol]
+        caliente = medir(nombre, metodo, url, client, frio=False)
+        frio = medir(nombre, metodo, url, client, frio=True)
+        resultados[nombre] = dict(caliente, url=url, metodo=metodo,
+                                  frio={k: frio[k] for k in ("p50_ms", "p95_ms", "p99_ms", "sql")})
+    return resultados
+
+
+def run(create_app, escalas, directorio, repeticiones=30, seed=1, passwords=None, log=print):
+    """Corre el benchmark en todas las escalas y devuelve el reporte completo."""
+    os.makedirs(directorio, exist_ok=True)
+    reporte = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "repeticiones": repeticiones,
+            "seed": seed,
+        },
+        "escalas": {},
+    }
+    for productos in escalas:
+        base = _dataset(directorio, productos, seed, passwords, log)
+        # Se trabaja sobre una copia: el checkout escribe pedidos en la base.
+        copia = os.path.join(directorio, f"bench-{productos}-run.db")
+        for sufijo in ("-wal", "-shm"):
+            if os.path.exists(copia + sufijo):
+                os.remove(copia + sufijo)
+        shutil.copyfile(base, copia)
+        log(f"Escala {productos} productos...")
+        reporte["escalas"][str(productos)] = run_scale(create_app, copia, repeticiones,
+                                                          image_dir=_image_dir(directorio))
+    return reporte
+
+
+def format_report(reporte):
+    """Tabla de texto con p50/p95/p99, SQL y tamaño por escala y ruta, y el
+    p95 y las SQL con los caches fríos."""
+    lineas = []
+    for escala, rutas in reporte["escalas"].items():
+        lineas.append(f"== {escala} productos")
+        lineas.append(f"{'ruta':28} {'p50':>9} {'p95':>9} {'p99':>9} {'sql':>5} {'bytes':>10} "
+                      f"{'p95 frío':>9} {'sql frío':>8}")
+        for nombre, r in rutas.items():
+            frio = r.get("frio") or {}
+            lineas.append(f"{nombre:28} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} "
+                          f"{r['sql']:5d} {r['bytes']:10d} {frio.get('p95_ms', 0):9.2f} {frio.get('sql', 0):8d}")
+    return "\n".join(lineas)
+
+
+def compare(base, actual, tolerancia=0.10):
+    """Compara dos reportes. Devuelve (líneas, regresiones) según el p95 de cada ruta."""
+    lineas, regresiones = [], []
+    for escala, rutas in actual["escalas"].items():
+        anteriores = base["escalas"].get(escala)
+        if not anteriores:
+            continue
+        lineas.append(f"== {escala} productos")
+        for nombre, r in rutas.items():
+            antes = anteriores.get(nombre)
+            if not antes:
+                continue
+            cambio = (r["p95_ms"] - antes["p95_ms"]) / antes["p95_ms"] if antes["p95_ms"] else 0.0
+            sql_frio, sql_frio_antes = (r.get("frio") or {}).get("sql"), (antes.get("frio") or {}).get("sql")
+            marca = ""
+            if (cambio > tolerancia or r["sql"] > antes["sql"]
+                    or (sql_frio is not None and sql_frio_antes is not None and sql_frio > sql_frio_antes)):
+                marca = "  << REGRESIÓN"
+                regresiones.append((escala, nombre))
+            lineas.append(f"{nombre:28} p95 {antes['p95_ms']:9.2f} -> {r['p95_ms']:9.2f} ({cambio:+.0%})  "
+                          f"sql {antes['sql']} -> {r['sql']}{marca}")
+    return lineas, regresiones
+
+
+def growth(reporte):
+    """Cuánto crece el p95 de cada ruta desde la escala más chica a la más grande."""
+    escalas = sorted(reporte["escalas"], key=int)
+    if len(escalas) < 2:
+        return []
+    chica, grande = reporte["escalas"][escalas[0]], reporte["escalas"][escalas[-1]]
+    lineas = [f"== crecimiento p95 {escalas[0]} -> {escalas[-1]} productos"]
+    for nombre in sorted(grande, key=lambda n: grande[n]["p95_ms"] / max(chica[n]["p95_ms"], 1e-9),
+                         reverse=True):
+        factor = grande[nombre]["p95_ms"] / max(chica[nombre]["p95_ms"], 1e-9)
+        lineas.append(f"{nombre:28} x{factor:.1f}")
+    return lineas
+
+
+def save(reporte, ruta):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+
+def load(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
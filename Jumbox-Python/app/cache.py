@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g
+
+_FALTA = object()
+
+
+class LRUCache:
+    """Cache LRU acotado en cantidad de entradas, seguro entre hilos."""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave, default=None, valido=None):
+        """Valor guardado, o default si no está o si valido(valor) es falso."""
+        with self._lock:
+            valor = self._datos.get(clave, _FALTA)
+            if valor is _FALTA or (valido is not None and not valido(valor)):
+                self.fallos += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entradas": len(self._datos), "maximo": self.maximo,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+class SizedLRUCache(LRUCache):
+    """LRU acotado por el largo total de sus valores (textos) en lugar de la
+    cantidad de entradas."""
+
+    def __init__(self, maximo):
+        super().__init__(maximo)
+        self.tamanio = 0
+
+    def set(self, clave, valor):
+        with self._lock:
+            anterior = self._datos.pop(clave, None)
+            if anterior is not None:
+                self.tamanio -= len(anterior)
+            self._datos[clave] = valor
+            self.tamanio += len(valor)
+            while self.tamanio > self.maximo:
+                _, viejo = self._datos.popitem(last=False)
+                self.tamanio -= len(viejo)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self.tamanio = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["tamanio"] = self.tamanio
+        return stats
+
+
+class VersionCounters:
+    """Copia en memoria de la tabla contador_cambios.
+
+    Los triggers suben el contador de una clave ('producto', 'categoria',
+    'almacen:<sucursal>') en cada cambio. La copia se relee cuando este
+    worker escribió en la base (mark_stale) o, para ver los cambios de otros
+    workers, cuando pasaron más de ttl segundos desde la última lectura.
+    """
+
+    def __init__(self, ttl=1.0):
+        self.ttl = ttl
+        self._versiones = {}
+        self._leido = None
+        self._lock = threading.Lock()
+
+    def mark_stale(self):
+        self._leido = None
+
+    def _vigente(self):
+        return self._leido is not None and time.monotonic() - self._leido < self.ttl
+
+    def get(self, conn, *claves):
+        """Tupla con la versión actual de cada clave (0 si nunca cambió)."""
+        if not self._vigente():
+            filas = conn.execute("SELECT clave, version FROM contador_cambios").fetchall()
+            with self._lock:
+                self._versiones = {clave: version for clave, version in filas}
+                self._leido = time.monotonic()
+        versiones = self._versiones
+        return tuple(versiones.get(clave, 0) for clave in claves)
+
+
+class VersionedCache(LRUCache):
+    """LRU cuyas entradas guardan las versiones de las que dependen y dejan
+    de valer en cuanto alguna de esas versiones cambia."""
+
+    def __init__(self, maximo, contadores):
+        super().__init__(maximo)
+        self.contadores = contadores
+
+    def get_or_load(self, conn, clave, dependencias, cargar):
+        versiones = self.contadores.get(conn, *dependencias)
+        entrada = self.get(clave, valido=lambda e: e[0] == versiones)
+        if entrada is not None:
+            return entrada[1]
+        valor = cargar()
+        self.set(clave, (versiones, valor))
+        return valor
+
+
+def version_counters(app=None):
+    return (app or current_app).extensions["version_counters"]
+
+
+def catalog_cache(app=None):
+    return (app or current_app).extensions["caches"]["catalogo"]
+
+
+def reference_cache(app=None):
+    """Datos de referencia (sucursales, categorías) de este worker."""
+    return (app or current_app).extensions["caches"]["referencia"]
+
+
+def _despues_de_escribir(exc=None):
+    # Un request que usó la conexión de escritura pudo cambiar contadores.
+    if "db_conn" in g:
+        version_counters().mark_stale()
+
+
+def init_app(app):
+    """Crea los contadores de versión, el cache del catálogo (CATALOG_CACHE_SIZE)
+    y el de datos de referencia."""
+    contadores = VersionCounters(app.config.get("CACHE_COUNTERS_TTL", 1.0))
+    app.extensions["version_counters"] = contadores
+    caches = app.extensions.setdefault("caches", {})
+    caches["catalogo"] = VersionedCache(app.config.get("CATALOG_CACHE_SIZE", 512), contadores)
+    caches["referencia"] = VersionedCache(16, contadores)
+    app.teardown_request(_despues_de_escribir)
@@ -0,0 +1,193 @@
+import os
+import click
+from flask import current_app
+
+
+@click.command("verificar-planes")
+@click.option("--db", "db_name", default=None,
+              help="Base a usar; por defecto una temporal con datos de prueba.")
+@click.option("-v", "--verbose", is_flag=True, help="Muestra el plan de todas las sentencias.")
+def verificar_planes(db_name, verbose):
+    """Falla si alguna consulta de las rutas escanea completa una tabla caliente."""
+    from app.explain import check_plans
+
+    errores = 0
+    for sentencia, plan, escaneadas in check_plans(current_app, db_name):
+        if escaneadas:
+            errores += 1
+            click.echo(f"SCAN {', '.join(sorted(escaneadas))}: {sentencia.ubicacion}", err=True)
+        elif verbose:
+            click.echo(f"ok: {sentencia.ubicacion}")
+        if escaneadas or verbose:
+            for detalle in plan:
+                click.echo(f"    {detalle}")
+
+    if errores:
+        raise click.ClickException(f"{errores} consulta(s) con escaneo completo de tablas calientes.")
+    click.echo("Planes de consulta OK.")
+
+
+@click.command("generar-datos")
+@click.option("--db", "db_name", required=True, help="Archivo de base a crear.")
+@click.option("--reemplazar", is_flag=True, help="Borra el archivo si ya existe.")
+@click.option("--seed", default=1, show_default=True, help="Semilla del generador.")
+@click.option("--categorias", type=int)
+@click.option("--productos", type=int)
+@click.option("--sucursales", type=int)
+@click.option("--clientes", type=int)
+@click.option("--carritos", type=int)
+@click.option("--pedidos", type=int)
+@click.option("--detalles-por-pedido", type=int, help="Promedio de renglones por pedido.")
+@click.option("--reposiciones", type=int)
+@click.option("--imagenes", type=int, help="Imágenes distintas a repartir (0 = sin imagen).")
+def generar_datos(db_name, reemplazar, seed, **cantidades):
+    """Crea una base con el esquema de bd.jumbox.py y datos sintéticos reproducibles.
+
+    Las cuentas generadas usan las contraseñas de prueba: Admin1234 (admin,
+    teléfono 12345678), Sucursal1111 (sucursales) y Usuario1234 (clientes).
+    """
+    from app.images import image_store
+    from app.synthetic import generate, seeded_passwords
+
+    if os.path.exists(db_name):
+        if not reemplazar:
+            raise click.ClickException(f"{db_name} ya existe (usá --reemplazar).")
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(db_name + sufijo):
+                os.remove(db_name + sufijo)
+
+    passwords = seeded_passwords(seed, current_app.config.get("BCRYPT_LOG_ROUNDS", 12))
+    cantidades = {k: v for k, v in cantidades.items() if v is not None}
+    try:
+        filas = generate(db_name, cantidades, seed=seed, passwords=passwords, log=click.echo,
+                         store=image_store())
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Listo: {sum(filas.values())} filas en {db_name}.")
+
+
+@click.command("benchmark")
+@click.option("--escalas", default="1000,10000,50000", show_default=True,
+              help="Cantidades de productos separadas por coma.")
+@click.option("--repeticiones", default=30, show_default=True, help="Requests medidos por ruta.")
+@click.option("--dir", "directorio", default="instance/bench", show_default=True,
+              help="Dónde guardar las bases generadas (se reutilizan entre corridas).")
+@click.option("--seed", default=1, show_default=True)
+@click.option("--salida", default=None, help="Archivo JSON donde guardar los resultados.")
+@click.option("--comparar", default=None, help="JSON de una corrida anterior para comparar.")
+@click.option("--tolerancia", default=0.10, show_default=True,
+              help="Aumento de p95 tolerado al comparar (0.10 = 10%).")
+def benchmark(escalas, repeticiones, directorio, seed, salida, comparar, tolerancia):
+    """Mide las rutas principales con el test client sobre bases de distintos tamaños."""
+    from app import create_app
+    from app import bench
+    from app.synthetic import seeded_passwords
+
+    passwords = seeded_passwords(seed, current_app.config.get("BCRYPT_LOG_ROUNDS", 12))
+    escalas = [int(e) for e in escalas.split(",") if e.strip()]
+    reporte = bench.run(create_app, escalas, directorio, repeticiones, seed, passwords, log=click.echo)
+
+    click.echo(bench.format_report(reporte))
+    for linea in bench.growth(reporte):
+        click.echo(linea)
+    if salida:
+        bench.save(reporte, salida)
+        click.echo(f"Resultados guardados en {salida}.")
+    if comparar:
+        lineas, regresiones = bench.compare(bench.load(comparar), reporte, tolerancia)
+        for linea in lineas:
+            click.echo(linea)
+        if regresiones:
+            raise click.ClickException(f"{len(regresiones)} ruta(s) empeoraron respecto de {comparar}.")
+
+
+@click.command("generar-variantes")
+@click.option("--todas", is_flag=True, help="Regenera también las variantes que ya están al día.")
+def generar_variantes(todas):
+    """Genera las miniaturas y variantes WebP que faltan de las imágenes de productos."""
+    from app.db import get_db
+    from app.images import missing_variants, pillow_available, save_variants
+
+    if not pillow_available():
+        raise click.ClickException("Hace falta Pillow para generar variantes (pip install Pillow).")
+
+    conn = get_db(write=True)
+    if todas:
+        ids = [r[0] for r in conn.execute(
+            "SELECT id_producto FROM producto WHERE imagen IS NOT NULL OR imagen_hash IS NOT NULL")]
+    else:
+        ids = missing_variants(conn)
+    # Una transacción por producto: cada imagen se lee y procesa de a una.
+    for n, id_producto in enumerate(ids, start=1):
+        save_variants(conn, id_producto)
+        conn.commit()
+        if n % 100 == 0:
+            click.echo(f"{n}/{len(ids)} productos...")
+    click.echo(f"Variantes generadas para {len(ids)} producto(s).")
+
+
+@click.command("migrar-imagenes")
+@click.option("--limpiar", is_flag=True, help="Borra del store los archivos que ningún producto usa.")
+@click.option("--vacuum", is_flag=True, help="Compacta la base al terminar para recuperar el espacio.")
+def migrar_imagenes(limpiar, vacuum):
+    """Pasa las imágenes de producto.imagen (BLOB) al store en disco por hash."""
+    from app.db import get_db
+    from app.images import blob_chunks, image_store
+
+    store = image_store()
+    conn = get_db(write=True)
+    ids = [r[0] for r in conn.execute("SELECT id_producto FROM producto WHERE imagen IS NOT NULL")]
+    hashes = set()
+    for n, id_producto in enumerate(ids, start=1):
+        # El BLOB se copia de a bloques, sin cargarlo entero en memoria.
+        digest = store.put_stream(blob_chunks(conn, id_producto))
+        hashes.add(digest)
+        version = conn.execute(
+            "SELECT imagen_version FROM producto WHERE id_producto = ?", (id_producto,)).fetchone()[0]
+        conn.execute("UPDATE producto SET imagen_hash = ?, imagen = NULL WHERE id_producto = ?",
+                     (digest, id_producto))
+        # Los triggers suben la versión aunque el contenido sea el mismo:
+        # las variantes ya generadas siguen valiendo para la nueva.
+        conn.execute("""
+            UPDATE producto_imagen_variante
+            SET imagen_version = (SELECT imagen_version FROM producto WHERE id_producto = ?)
+            WHERE fk_producto = ? AND imagen_version = ?
+        """, (id_producto, id_producto, version))
+        conn.commit()
+        if n % 100 == 0:
+            click.echo(f"{n}/{len(ids)} imágenes...")
+    click.echo(f"{len(ids)} imagen(es) migradas, {len(hashes)} archivo(s) distintos en {store.root}.")
+
+    if limpiar:
+        usados = {r[0] for r in conn.execute(
+            "SELECT DISTINCT imagen_hash FROM producto WHERE imagen_hash IS NOT NULL")}
+        huerfanos = [d for d in store.digests() if d not in usados]
+        for digest in huerfanos:
+            store.remove(digest)
+        click.echo(f"{len(huerfanos)} archivo(s) sin usar borrados.")
+
+    if vacuum:
+        conn.execute("VACUUM")
+        click.echo("Base compactada.")
+
+
+@click.command("precomprimir-estaticos")
+@click.option("--minimo", default=500, show_default=True, help="Tamaño mínimo (bytes) a comprimir.")
+def precomprimir_estaticos(minimo):
+    """Genera los .gz (y .br si está instalado brotli) de los archivos de static."""
+    from app.compression import available_encodings, precompress_static
+
+    escritos = precompress_static(current_app.static_folder, minimo)
+    for ruta in escritos:
+        click.echo(f"{os.path.relpath(ruta, current_app.static_folder)} ({os.path.getsize(ruta)} bytes)")
+    click.echo(f"{len(escritos)} archivo(s) generados ({', '.join(available_encodings())}).")
+
+
+def init_app(app):
+    """Registra los comandos de la app en el CLI de flask."""
+    app.cli.add_command(verificar_planes)
+    app.cli.add_command(generar_datos)
+    app.cli.add_command(benchmark)
+    app.cli.add_command(generar_variantes)
+    app.cli.add_command(migrar_imagenes)
+    app.cli.add_command(precomprimir_estaticos)
@@ -0,0 +1,126 @@
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se usa gzip
+    brotli = None
+
+# Tipos que vale la pena comprimir (las imágenes ya vienen comprimidas).
+COMPRIMIBLES = {
+    "text/html", "text/css", "text/plain", "text/javascript", "application/javascript",
+    "application/json", "image/svg+xml",
+}
+# Extensiones de los archivos de static que se precomprimen.
+EXTENSIONES_ESTATICAS = {".css", ".js", ".svg", ".html", ".json", ".txt"}
+# encoding -> extensión del archivo precomprimido
+SUFIJOS = {"br": ".br", "gzip": ".gz"}
+# Niveles para respuestas dinámicas: rápidos, se comprimen en cada request.
+NIVELES = {"br": 4, "gzip": 6}
+
+
+def available_encodings():
+    """Encodings soportados, del preferido al último."""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def compress(datos, encoding, nivel=None):
+    """Comprime con "br" o "gzip". Sin nivel usa el máximo (para static)."""
+    if encoding == "br":
+        return brotli.compress(datos, quality=11 if nivel is None else nivel)
+    return gzip.compress(datos, compresslevel=9 if nivel is None else nivel, mtime=0)
+
+
+def _negociar(encodings):
+    """El encoding de la lista que prefiere el cliente según Accept-Encoding."""
+    return request.accept_encodings.best_match(encodings) if encodings else None
+
+
+def compress_response(resp):
+    """after_request: comprime las respuestas de texto de al menos
+    COMPRESS_MIN_SIZE bytes si el cliente lo acepta."""
+    if (resp.direct_passthrough or resp.is_streamed or not 200 <= resp.status_code < 300
+            or resp.status_code == 204 or "Content-Encoding" in resp.headers
+            or resp.mimetype not in COMPRIMIBLES or resp.cache_control.no_transform):
+        return resp
+    datos = resp.get_data()
+    if len(datos) < current_app.config.get("COMPRESS_MIN_SIZE", 500):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    encoding = _negociar(available_encodings())
+    if not encoding:
+        return resp
+    resp.set_data(compress(datos, encoding, NIVELES[encoding]))
+    resp.headers["Content-Encoding"] = encoding
+    # El cuerpo comprimido es otra representación: el ETag pasa a ser débil.
+    etag, debil = resp.get_etag()
+    if etag and not debil:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def send_static(filename, max_age=None):
+    """Archivo de static: si hay una versión precomprimida (archivo.br /
+    archivo.gz, más nueva que el original) que el cliente acepta, la manda
+    con su Content-Encoding sin comprimir nada en el request."""
+    carpeta = current_app.static_folder
+    original = safe_join(carpeta, filename)
+    if max_age is None:
+        max_age = current_app.get_send_file_max_age(filename)
+    if original and os.path.isfile(original):
+        existentes = [
+            encoding for encoding in available_encodings()
+            if os.path.isfile(original + SUFIJOS[encoding])
+            and os.path.getmtime(original + SUFIJOS[encoding]) >= os.path.getmtime(original)
+        ]
+        encoding = _negociar(existentes)
+        if encoding:
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            resp = send_from_directory(carpeta, filename + SUFIJOS[encoding], mimetype=mimetype,
+                                       max_age=max_age)
+            resp.headers["Content-Encoding"] = encoding
+            resp.vary.add("Accept-Encoding")
+            return resp
+    resp = send_from_directory(carpeta, filename, max_age=max_age)
+    if os.path.splitext(filename)[1] in EXTENSIONES_ESTATICAS:
+        resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def static_view(filename):
+    """Reemplaza a la vista static de Flask."""
+    return send_static(filename)
+
+
+def precompress_static(carpeta, minimo=0):
+    """Escribe .gz (y .br si hay brotli) junto a cada archivo de texto de
+    static que no los tenga al día. Devuelve la lista de archivos escritos."""
+    escritos = []
+    for raiz, _, archivos in os.walk(carpeta):
+        for nombre in archivos:
+            if os.path.splitext(nombre)[1] not in EXTENSIONES_ESTATICAS:
+                continue
+            ruta = os.path.join(raiz, nombre)
+            if os.path.getsize(ruta) < minimo:
+                continue
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            for encoding in available_encodings():
+                destino = ruta + SUFIJOS[encoding]
+                if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(ruta):
+                    continue
+                with open(destino, "wb") as f:
+                    f.write(compress(datos, encoding))
+                escritos.append(destino)
+    return escritos
+
+
+def init_app(app):
+    """Comprime las respuestas dinámicas y sirve static precomprimido."""
+    app.after_request(compress_response)
+    if app.static_folder and "static" in app.view_functions:
+        app.view_functions["static"] = static_view
@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from flask import Response, current_app, make_response, request, session
+
+
+def page_etag(*versiones):
+    """ETag de una página a partir de las versiones de los datos que muestra
+    (contadores de cambios, versión del cliente), la sesión y la versión del
+    código. None si hay mensajes flash pendientes: esos se muestran una vez."""
+    if session.get("_flashes"):
+        return None
+    partes = (current_app.extensions["version_codigo"], session.get("id_cliente"), session.get("tipo"),
+              session.get("nombre"), session.get("cliente_sucursal_id")) + versiones
+    return hashlib.sha1(repr(partes).encode()).hexdigest()[:20]
+
+
+def _revalidar(resp, etag):
+    # Débil: la misma versión puede ir comprimida o no.
+    resp.set_etag(etag, weak=True)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+
+def not_modified(etag):
+    """Respuesta 304 si el navegador ya tiene esta versión de la página; si
+    no, None y la vista sigue con sus consultas."""
+    if etag and request.if_none_match.contains_weak(etag):
+        return _revalidar(Response(status=304), etag)
+    return None
+
+
+def with_etag(resp, etag):
+    """La respuesta de la vista con su ETag (si hay)."""
+    resp = make_response(resp)
+    return _revalidar(resp, etag) if etag else resp
+
+
+def code_version(app):
+    """Hash de los templates, el código de la app y los nombres de static:
+    un despliegue nuevo invalida todos los ETag de páginas."""
+    sha = hashlib.sha1()
+    env = app.jinja_env
+    for nombre in sorted(env.list_templates()):
+        sha.update(nombre.encode())
+        sha.update(env.loader.get_source(env, nombre)[0].encode())
+    paquete = os.path.dirname(__file__)
+    for raiz, carpetas, archivos in os.walk(paquete):
+        carpetas.sort()
+        for nombre in sorted(archivos):
+            if nombre.endswith(".py"):
+                with open(os.path.join(raiz, nombre), "rb") as f:
+                    sha.update(f.read())
+    manifest = app.extensions.get("static_manifest")
+    if manifest:
+        sha.update(repr(sorted(manifest.archivos.items())).encode())
+    return sha.hexdigest()[:12]
+
+
+def init_app(app):
+    """Calcula la versión del código. Va después de registrar los blueprints."""
+    app.extensions["version_codigo"] = code_version(app)
@@ -0,0 +1,263 @@
+import queue
+import sqlite3
+import threading
+import time
+from flask import g, current_app, request, has_request_context
+
+
+class TimedConnection(sqlite3.Connection):
+    """Conexión que avisa a sus listeners cada sentencia ejecutada y cuánto tardó.
+
+    Cada listener recibe (sql, params, segundos). Sin listeners no mide nada.
+    """
+
+    listeners = ()
+
+    def _notificar(self, sql, params, duracion):
+        for listener in self.listeners:
+            listener(sql, params, duracion)
+
+    def execute(self, sql, params=()):
+        if not self.listeners:
+            return super().execute(sql, params)
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, params):
+        if not self.listeners:
+            return super().executemany(sql, params)
+        return self.cursor().executemany(sql, params)
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor de TimedConnection.
+
+    Si la sentencia devuelve filas, el aviso se demora hasta el primer
+    fetchall/fetchone/fetchmany para incluir también el tiempo de traerlas
+    (SQLite resuelve buena parte de un SELECT recién al leerlo).
+    """
+
+    _pendiente = None
+
+    def _avisar_pendiente(self, extra=0.0):
+        if self._pendiente is not None:
+            sql, params, duracion = self._pendiente
+            self._pendiente = None
+            self.connection._notificar(sql, params, duracion + extra)
+
+    def _medir(self, metodo, sql, params, muchos=False):
+        self._avisar_pendiente()
+        inicio = time.perf_counter()
+        # En executemany los listeners reciben params=None (pueden venir de un generador).
+        aviso = None if muchos else params
+        try:
+            metodo(sql, params)
+        except Exception:
+            self.connection._notificar(sql, aviso, time.perf_counter() - inicio)
+            raise
+        duracion = time.perf_counter() - inicio
+        if self.description is None:
+            self.connection._notificar(sql, aviso, duracion)
+        else:
+            self._pendiente = (sql, aviso, duracion)
+        return self
+
+    def execute(self, sql, params=()):
+        if not self.connection.listeners:
+            return super().execute(sql, params)
+        return self._medir(super().execute, sql, params)
+
+    def executemany(self, sql, params):
+        if not self.connection.listeners:
+            return super().executemany(sql, params)
+        return self._medir(super().executemany, sql, params, muchos=True)
+
+    def _fetch(self, metodo, *args):
+        if self._pendiente is None:
+            return metodo(*args)
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            self._avisar_pendiente(time.perf_counter() - inicio)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def __iter__(self):
+        self._avisar_pendiente()
+        return self
+
+
+class ConnectionPool:
+    """Pool de conexiones SQLite ya configuradas (row_factory y FK on).
+
+    Cada request toma una sola conexión del pool y la devuelve en el
+    teardown de la app, así no se abre y cierra una conexión por consulta.
+    Con readonly=True las conexiones se abren con mode=ro y no pueden escribir.
+    """
+
+    def __init__(self, db_name, size=8, timeout=10.0, readonly=False, wal=True, on_connect=(),
+                 listeners=None):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.readonly = readonly
+        self.wal = wal
+        # Funciones que reciben cada conexión nueva (instrumentación, trazas).
+        self.on_connect = list(on_connect)
+        # Listeners de sentencias SQL; la lista se comparte con las conexiones.
+        self.listeners = listeners if listeners is not None else []
+        self._libres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._creadas = 0
+        self._en_uso = 0
+        self._checkouts = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+
+    def _conectar(self):
+        if self.readonly:
+            conn = sqlite3.connect(f"file:{self.db_name}?mode=ro", uri=True, factory=TimedConnection,
+                                   timeout=self.timeout, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, factory=TimedConnection,
+                                   timeout=self.timeout, check_same_thread=False)
+            if self.wal:
+                # En WAL las lecturas no esperan a las escrituras (checkout, reposición).
+                conn.execute("PRAGMA journal_mode = WAL;")
+                conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.listeners = self.listeners
+        for hook in self.on_connect:
+            hook(conn)
+        return conn
+
+    def acquire(self):
+        """Entrega una conexión libre; si no hay y el pool no está lleno, abre una nueva."""
+        inicio = time.perf_counter()
+        conn = None
+        try:
+            conn = self._libres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                crear = self._creadas < self.size
+                if crear:
+                    self._creadas += 1
+            if crear:
+                try:
+                    conn = self._conectar()
+                except Exception:
+                    with self._lock:
+                        self._creadas -= 1
+                    raise
+            else:
+                try:
+                    conn = self._libres.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise RuntimeError("No hay conexiones libres en el pool de la base de datos.")
+
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self._en_uso += 1
+            self._checkouts += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+        return conn
+
+    def release(self, conn):
+        """Devuelve la conexión al pool descartando cualquier transacción abierta."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._creadas -= 1
+                self._en_uso -= 1
+            return
+        with self._lock:
+            self._en_uso -= 1
+        self._libres.put(conn)
+
+    def stats(self):
+        """Tamaño del pool y tiempos de espera acumulados al pedir conexiones."""
+        with self._lock:
+            return {
+                "readonly": self.readonly,
+                "size": self.size,
+                "abiertas": self._creadas,
+                "en_uso": self._en_uso,
+                "libres": self._libres.qsize(),
+                "checkouts": self._checkouts,
+                "espera_total": self._espera_total,
+                "espera_promedio": self._espera_total / self._checkouts if self._checkouts else 0.0,
+                "espera_max": self._espera_max,
+            }
+
+
+# Clave en g -> pool del que sale la conexión
+_POOLS = {"db_conn": "db_pool", "db_conn_ro": "db_pool_ro"}
+
+
+def get_db(write=None):
+    """Conexión del request actual, tomada del pool la primera vez que se pide.
+
+    Los GET/HEAD usan por defecto una conexión de solo lectura; el resto de
+    los métodos (y el código fuera de un request) usan la de escritura.
+    Un GET que necesita escribir tiene que pedir write=True.
+    """
+    if write is None:
+        write = not (has_request_context() and request.method in ("GET", "HEAD"))
+    clave = "db_conn" if write else "db_conn_ro"
+    if clave not in g:
+        setattr(g, clave, current_app.extensions[_POOLS[clave]].acquire())
+    return g.get(clave)
+
+
+def release_db(exc=None):
+    """Devuelve a su pool las conexiones del request (teardown_appcontext)."""
+    for clave, pool in _POOLS.items():
+        conn = g.pop(clave, None)
+        if conn is not None:
+            current_app.extensions[pool].release(conn)
+
+
+def add_sql_listener(app, listener):
+    """Registra listener(sql, params, segundos) para cada sentencia de la app."""
+    app.extensions["sql_listeners"].append(listener)
+
+
+def init_app(app):
+    """Crea los pools de escritura y de lectura y registra su liberación."""
+    listeners = app.extensions.setdefault("sql_listeners", [])
+    pool = ConnectionPool(
+        app.config["DB_NAME"],
+        size=app.config.get("DB_POOL_SIZE", 8),
+        timeout=app.config.get("DB_POOL_TIMEOUT", 10.0),
+        wal=app.config.get("DB_WAL", True),
+        on_connect=app.config.get("DB_ON_CONNECT", ()),
+        listeners=listeners,
+    )
+    # Abre ya una conexión de escritura: crea el archivo si falta y deja la base en WAL
+    # antes de que las conexiones de solo lectura intenten abrirla.
+    pool.release(pool.acquire())
+    app.extensions["db_pool"] = pool
+    app.extensions["db_pool_ro"] = ConnectionPool(
+        app.config["DB_NAME"],
+        size=app.config.get("DB_POOL_RO_SIZE", 16),
+        timeout=app.config.get("DB_POOL_TIMEOUT", 10.0),
+        readonly=True,
+        on_connect=app.config.get("DB_ON_CONNECT", ()),
+        listeners=listeners,
+    )
+    app.teardown_appcontext(release_db)
@@ -0,0 +1,173 @@
+import ast
+import os
+import re
+import sqlite3
+import tempfile
+
+from app.migrations import migrate
+from app.queries import catalog_shapes
+
+# Tablas que crecen con el uso: un SCAN completo sobre ellas en una consulta
+# de request es una regresión de índices.
+HOT_TABLES = {"pedido", "detalles_pedido", "producto_carrito", "almacen_sucursal"}
+
+# Consultas que recorren toda la tabla a propósito (totales históricos).
+# Clave: "modulo:funcion" -> tablas que sí pueden escanear.
+SCAN_ALLOWED = {
+    "admin.routes:admin_estadisticas": {"pedido", "detalles_pedido"},
+}
+
+# Lo que tiene plan de consulta; DDL, PRAGMA y ANALYZE no se revisan.
+_CONSULTA_RE = re.compile(r"(?:SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+
+_ALIAS_RE = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|SET\b|GROUP\b|ORDER\b|LIMIT\b|USING\b|VALUES\b)(\w+))?',
+    re.IGNORECASE,
+)
+
+
+class SQLStatement:
+    """Sentencia SQL literal encontrada en el código de la app."""
+
+    def __init__(self, sql, archivo, linea, funcion):
+        self.sql = sql
+        self.archivo = archivo
+        self.linea = linea
+        self.funcion = funcion
+
+    @property
+    def ubicacion(self):
+        return f"{self.archivo}:{self.linea} ({self.funcion})"
+
+    @property
+    def clave(self):
+        modulo = os.path.splitext(self.archivo)[0].replace(os.sep, ".")
+        return f"{modulo}:{self.funcion}"
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.funciones = []
+        self.sentencias = []
+
+    def visit_FunctionDef(self, node):
+        self.funciones.append(node.name)
+        self.generic_visit(node)
+        self.funciones.pop()
+
+    def visit_Call(self, node):
+        if (isinstance(node.func, ast.Attribute) and node.func.attr in ("execute", "executemany")
+                and node.args and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str)):
+            funcion = self.funciones[-1] if self.funciones else "<modulo>"
+            self.sentencias.append(
+                SQLStatement(node.args[0].value.strip(), self.archivo, node.lineno, funcion))
+        self.generic_visit(node)
+
+
+def collect_statements(app):
+    """Sentencias SQL (consultas y DML) de todos los módulos de la app y las
+    formas de CatalogQuery."""
+    raiz = os.path.dirname(app.root_path)
+    archivos = set()
+    for carpeta, _, nombres in os.walk(app.root_path):
+        archivos.update(os.path.join(carpeta, n) for n in nombres if n.endswith(".py"))
+
+    sentencias = []
+    for ruta in sorted(archivos):
+        with open(ruta, encoding="utf-8") as f:
+            arbol = ast.parse(f.read(), ruta)
+        collector = _Collector(os.path.relpath(ruta, os.path.join(raiz, "app")))
+        collector.visit(arbol)
+        sentencias.extend(s for s in collector.sentencias if _CONSULTA_RE.match(s.sql))
+
+    # Las consultas armadas por CatalogQuery no son literales: se agregan todas sus formas.
+    for consulta in catalog_shapes():
+        sql, _ = consulta.build()
+        sentencias.append(SQLStatement(sql, "queries.py", 0, consulta.nombre))
+    return sentencias
+
+
+def table_aliases(sql):
+    """Mapa alias -> tabla de las tablas nombradas en FROM/JOIN/UPDATE/INTO."""
+    alias = {}
+    for tabla, nombre in _ALIAS_RE.findall(sql):
+        alias[tabla] = tabla
+        if nombre:
+            alias[nombre] = tabla
+    return alias
+
+
+def query_plan(conn, sql):
+    """Filas de EXPLAIN QUERY PLAN, con NULL en cada parámetro."""
+    params = [None] * sql.count("?")
+    return [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def full_scans(sql, plan):
+    """Tablas calientes que el plan recorre completas (SCAN, con o sin índice)."""
+    alias = table_aliases(sql)
+    escaneadas = set()
+    for detalle in plan:
+        partes = detalle.split()
+        if len(partes) >= 2 and partes[0] == "SCAN":
+            tabla = alias.get(partes[1], partes[1])
+            if tabla in HOT_TABLES:
+                escaneadas.add(tabla)
+    return escaneadas
+
+
+def seed(conn, filas=200):
+    """Carga unas pocas filas en cada tabla para que las consultas tengan datos."""
+    conn.executemany("INSERT INTO categoria (nombre) VALUES (?)",
+                     [(f"Categoria {i}",) for i in range(10)])
+    conn.executemany(
+        "INSERT INTO cliente (nombre, direccion, telefono, contrasena, tipo) VALUES (?, ?, ?, '', ?)",
+        [(f"Cliente {i}", "Calle", 10000000 + i, "sucursal" if i < 3 else "usuario") for i in range(50)])
+    conn.executemany(
+        "INSERT INTO producto (nombre, precio, stock, fk_categoria) VALUES (?, ?, ?, ?)",
+        [(f"Producto {i}", 100.0 + i, 50, 1 + i % 10) for i in range(filas)])
+    conn.executemany(
+        "INSERT INTO almacen_sucursal (fk_sucursal, fk_producto, cantidad) VALUES (?, ?, 10)",
+        [(s, p) for s in (1, 2, 3) for p in range(1, filas + 1)])
+    conn.executemany("INSERT INTO carrito (fk_cliente) VALUES (?)", [(c,) for c in range(4, 51)])
+    conn.executemany(
+        "INSERT INTO producto_carrito (fk_producto, fk_carrito, cantidad) VALUES (?, ?, 1)",
+        [(1 + i % filas, 1 + i % 47) for i in range(filas)])
+    conn.executemany(
+        "INSERT INTO pedido (fecha, estado, fk_cliente, fk_sucursal) VALUES ('2025-01-01', 'pendiente', ?, ?)",
+        [(4 + i % 47, 1 + i % 3) for i in range(filas)])
+    conn.executemany(
+        "INSERT INTO detalles_pedido (cantidad, fk_producto, fk_pedido) VALUES (1, ?, ?)",
+        [(1 + i % filas, 1 + i % filas) for i in range(filas * 3)])
+    conn.commit()
+
+
+def check_plans(app, db_name=None):
+    """Corre EXPLAIN QUERY PLAN sobre cada sentencia de las rutas.
+
+    Sin db_name arma una base temporal migrada y con datos de prueba.
+    Devuelve una lista de (sentencia, plan, tablas escaneadas de más).
+    """
+    temporal = None
+    if db_name is None:
+        fd, temporal = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        migrate(temporal)
+        conn = sqlite3.connect(temporal)
+        seed(conn)
+    else:
+        conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True)
+
+    try:
+        resultados = []
+        for sentencia in collect_statements(app):
+            plan = query_plan(conn, sentencia.sql)
+            escaneadas = full_scans(sentencia.sql, plan) - SCAN_ALLOWED.get(sentencia.clave, set())
+            resultados.append((sentencia, plan, escaneadas))
+        return resultados
+    finally:
+        conn.close()
+        if temporal:
+            os.remove(temporal)
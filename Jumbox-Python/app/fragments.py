@@ -0,0 +1,50 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from app.cache import SizedLRUCache
+
+
+class FragmentCacheExtension(Extension):
+    """Etiqueta {% cache clave, ... %}...{% endcache %} para los templates.
+
+    Guarda el HTML ya renderizado del bloque bajo la tupla de claves. Las
+    claves tienen que incluir todo lo que cambia el contenido (por ejemplo id
+    y versión del producto y el nivel de stock): el bloque no se vuelve a
+    renderizar mientras la tupla sea la misma.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        claves = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            claves.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(("name:endcache",), drop_needle=True)
+        llamada = self.call_method("_cache_support", [nodes.Tuple(claves, "load")])
+        return nodes.CallBlock(llamada, [], [], cuerpo).set_lineno(lineno)
+
+    def _cache_support(self, clave, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        html = cache.get(clave)
+        if html is None:
+            html = caller()
+            cache.set(clave, html)
+        return html
+
+
+def init_app(app):
+    """Instala {% cache %} con un LRU de FRAGMENT_CACHE_SIZE caracteres en
+    total (0 lo apaga: los bloques se renderizan siempre)."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    maximo = app.config.get("FRAGMENT_CACHE_SIZE", 0)
+    if maximo:
+        cache = SizedLRUCache(maximo)
+        app.jinja_env.fragment_cache = cache
+        app.extensions.setdefault("caches", {})["fragmentos"] = cache
@@ -0,0 +1,250 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger("jumbox.images")
+
+# Firmas de los formatos que acepta allowed_file.
+_FIRMAS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# Un año: las URLs de imagen llevan la versión, así que nunca cambian de contenido.
+CACHE_SEGUNDOS = 365 * 24 * 3600
+
+# nombre -> (lado máximo en px, formato de Pillow, calidad)
+VARIANTES = {
+    "mini": (320, "WEBP", 80),
+    "mini_jpg": (320, "JPEG", 82),
+    "webp": (1200, "WEBP", 85),
+}
+_MIMETYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+def image_mimetype(datos):
+    """Content-Type de una imagen según sus primeros bytes."""
+    for firma, mimetype in _FIRMAS:
+        if datos.startswith(firma):
+            return mimetype
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def image_etag(id_producto, version, variante=None):
+    """ETag fuerte: (producto, versión, variante) identifica un único contenido."""
+    etag = f"p{id_producto}-v{version}"
+    return f"{etag}-{variante}" if variante else etag
+
+
+def make_variants(datos):
+    """Genera las VARIANTES de una imagen: nombre -> (mimetype, bytes).
+
+    Pillow es opcional: sin él (o si la imagen no se puede leer) devuelve {}
+    y las URLs de variantes sirven la imagen original.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Pillow no está instalado: no se generan variantes de imagen.")
+        return {}
+
+    try:
+        original = Image.open(io.BytesIO(datos))
+        original.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning("No se pudo leer la imagen: %s", e)
+        return {}
+
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "transparency" in original.info else "RGB")
+
+    variantes = {}
+    for nombre, (lado, formato, calidad) in VARIANTES.items():
+        imagen = original.copy()
+        imagen.thumbnail((lado, lado), Image.LANCZOS)
+        if formato == "JPEG" and imagen.mode == "RGBA":
+            fondo = Image.new("RGB", imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel("A"))
+            imagen = fondo
+        salida = io.BytesIO()
+        if formato == "WEBP":
+            imagen.save(salida, formato, quality=calidad, method=4)
+        else:
+            imagen.save(salida, formato, quality=calidad, optimize=True, progressive=True)
+        variantes[nombre] = (_MIMETYPES[formato], salida.getvalue())
+    return variantes
+
+
+class ImageStore:
+    """Imágenes en disco direccionadas por contenido.
+
+    Cada archivo se llama como el sha256 de sus bytes (ab/cd/abcd...), así
+    dos productos con la misma imagen comparten un único archivo.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, datos):
+        """Guarda los bytes y devuelve su hash."""
+        return self.put_stream([datos])
+
+    def put_stream(self, bloques):
+        """Guarda el contenido de un iterable de bloques de bytes sin juntarlo
+        en memoria y devuelve su hash."""
+        os.makedirs(self.root, exist_ok=True)
+        sha = hashlib.sha256()
+        fd, temporal = tempfile.mkstemp(dir=self.root, prefix=".subiendo-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for bloque in bloques:
+                    sha.update(bloque)
+                    f.write(bloque)
+            digest = sha.hexdigest()
+            destino = self.path(digest)
+            if os.path.exists(destino):
+                os.remove(temporal)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(temporal, destino)
+            return digest
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def read(self, digest):
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def head(self, digest, n=16):
+        """Primeros bytes del archivo (alcanza para image_mimetype)."""
+        with open(self.path(digest), "rb") as f:
+            return f.read(n)
+
+    def digests(self):
+        """Hashes de todos los archivos guardados."""
+        for carpeta, _, archivos in os.walk(self.root):
+            for nombre in archivos:
+                if not nombre.startswith("."):
+                    yield nombre
+
+    def remove(self, digest):
+        os.remove(self.path(digest))
+
+
+def image_store(app=None):
+    from flask import current_app
+    return (app or current_app).extensions["image_store"]
+
+
+def store_response(digest):
+    """Respuesta con un archivo del store.
+
+    Con IMAGE_SENDFILE el cuerpo lo manda el servidor web (X-Sendfile o
+    X-Accel-Redirect) y el worker de Flask no lee el archivo. Si el archivo
+    falta en el store responde 404.
+    """
+    from flask import Response, abort, current_app, send_file
+
+    store = image_store()
+    try:
+        mimetype = image_mimetype(store.head(digest))
+    except FileNotFoundError:
+        logger.error("Falta el archivo %s en el store de imágenes.", digest)
+        abort(404)
+    modo = current_app.config.get("IMAGE_SENDFILE")
+    if modo == "x-sendfile":
+        resp = Response(mimetype=mimetype)
+        resp.headers["X-Sendfile"] = os.path.abspath(store.path(digest))
+    elif modo == "x-accel-redirect":
+        resp = Response(mimetype=mimetype)
+        prefijo = current_app.config.get("IMAGE_SENDFILE_PREFIX", "/").rstrip("/")
+        resp.headers["X-Accel-Redirect"] = f"{prefijo}/{digest[:2]}/{digest[2:4]}/{digest}"
+    else:
+        resp = send_file(store.path(digest), mimetype=mimetype, conditional=False, etag=False)
+    return resp
+
+
+def read_image(conn, id_producto):
+    """Bytes de la imagen del producto, esté en el store o todavía en el BLOB."""
+    fila = conn.execute(
+        "SELECT imagen_hash, CASE WHEN imagen_hash IS NULL THEN imagen END AS imagen "
+        "FROM producto WHERE id_producto = ?", (id_producto,)
+    ).fetchone()
+    if not fila:
+        return None
+    if fila["imagen_hash"]:
+        return image_store().read(fila["imagen_hash"])
+    return fila["imagen"]
+
+
+def blob_chunks(conn, id_producto, tamanio=64 * 1024):
+    """Lee el BLOB producto.imagen de a bloques con la API incremental de SQLite."""
+    with conn.blobopen("producto", "imagen", id_producto, readonly=True) as blob:
+        while True:
+            bloque = blob.read(tamanio)
+            if not bloque:
+                return
+            yield bloque
+
+
+def save_variants(conn, id_producto, datos=None):
+    """Regenera las variantes del producto para su versión de imagen actual.
+
+    Devuelve cuántas variantes guardó (0 si no tiene imagen o no hay Pillow).
+    """
+    fila = conn.execute("""
+        SELECT imagen_version, (imagen IS NOT NULL OR imagen_hash IS NOT NULL) AS tiene_imagen
+        FROM producto WHERE id_producto = ?
+    """, (id_producto,)).fetchone()
+    conn.execute("DELETE FROM producto_imagen_variante WHERE fk_producto = ?", (id_producto,))
+    if not fila or not fila["tiene_imagen"]:
+        return 0
+
+    if datos is None:
+        datos = read_image(conn, id_producto)
+    variantes = make_variants(datos)
+    conn.executemany("""
+        INSERT INTO producto_imagen_variante (fk_producto, variante, imagen_version, mimetype, datos)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(id_producto, nombre, fila["imagen_version"], mimetype, contenido)
+          for nombre, (mimetype, contenido) in variantes.items()])
+    return len(variantes)
+
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def missing_variants(conn):
+    """Ids de productos con imagen cuyas variantes faltan o quedaron viejas."""
+    return [r[0] for r in conn.execute("""
+        SELECT p.id_producto FROM producto p
+        WHERE (p.imagen IS NOT NULL OR p.imagen_hash IS NOT NULL)
+          AND (SELECT COUNT(*) FROM producto_imagen_variante v
+               WHERE v.fk_producto = p.id_producto AND v.imagen_version = p.imagen_version) < ?
+        ORDER BY p.id_producto
+    """, (len(VARIANTES),))]
+
+
+def init_app(app):
+    """Crea el store de imágenes (IMAGE_STORE_DIR, por defecto instance/imagenes)."""
+    raiz = app.config.get("IMAGE_STORE_DIR") or os.path.join(app.instance_path, "imagenes")
+    app.extensions["image_store"] = ImageStore(raiz)
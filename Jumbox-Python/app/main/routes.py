@@ -1,119 +1,187 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-import base64
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, session, abort, Response,
+                   make_response, jsonify, current_app)
 from app.utils import get_conn, listar_sucursales, listar_categorias
+from app.images import CACHE_SEGUNDOS, VARIANTES, image_etag, image_mimetype, store_response
+from app.queries import CatalogQuery
+from app.cache import catalog_cache, version_counters
+from app.conditional import not_modified, page_etag, with_etag
+from app.stock import stock_ledger
+from app.search import fts_enabled, fts_query, suggestion_index
+from app.sqlbudget import sql_budget
 
 main_bp = Blueprint('main', __name__, template_folder='../../templates')
 
+PRODUCTOS_POR_PAGINA = 24
+PRODUCTOS_POR_PAGINA_MAX = 96
+
 @main_bp.route('/')
+# 6 = contadores, sucursales, catálogo, categorías y las 2 de recargar el
+# stock de la sucursal cuando otro worker lo cambió.
+@sql_budget(6)
 def home():
     categoria_filtro = request.args.get('categoria', None)
     busqueda = request.args.get('q', '').strip()
+    despues = request.args.get('despues', type=int)
+    rango = request.args.get('rango', type=float)
+    por_pagina = request.args.get('por_pagina', type=int)
+    limite = min(max(por_pagina or PRODUCTOS_POR_PAGINA, 1), PRODUCTOS_POR_PAGINA_MAX)
+    # El scroll infinito pide solo las tarjetas de la página siguiente.
+    fragmento = request.args.get('fragmento') == '1'
     conn = get_conn()
 
-    sucursales = listar_sucursales(conn)
+    # Con la sucursal ya elegida, si el navegador tiene esta versión de la
+    # página se responde 304 sin consultar el catálogo ni renderizar.
+    etag = None
+    if 'cliente_sucursal_id' in session:
+        etag = page_etag(*version_counters().get(conn, 'producto', 'categoria', 'sucursales',
+                                                  f"almacen:{session['cliente_sucursal_id']}"))
+        resp = not_modified(etag)
+        if resp:
+            return resp
+
+    if fragmento and 'cliente_sucursal_id' in session:
+        sucursales = []
+    else:
+        sucursales = listar_sucursales(conn)
     
     if 'cliente_sucursal_id' not in session and sucursales:
         session['cliente_sucursal_id'] = sucursales[0]['id']
     
     cliente_sucursal_id = session.get('cliente_sucursal_id')
 
-    categorias = conn.execute("SELECT nombre FROM categoria ORDER BY nombre").fetchall()
-    categorias_lista = [c['nombre'] for c in categorias]
-
-    if categoria_filtro and busqueda:
-        # Ambos filtros: categoría y búsqueda
-        productos = conn.execute("""
-            SELECT
-                p.id_producto AS id,
-                p.nombre,
-                p.precio,
-                COALESCE(a.cantidad, 0) AS stock,
-                p.imagen,
-                p.fk_categoria,
-                c.nombre AS categoria_nombre
-            FROM producto p
-            JOIN categoria c ON p.fk_categoria = c.id_categoria
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            WHERE c.nombre = ? AND p.nombre LIKE ?
-            ORDER BY p.id_producto DESC
-        """, (cliente_sucursal_id, categoria_filtro, '%' + busqueda + '%')).fetchall()
-    elif categoria_filtro:
-        # Solo filtro de categoría
-        productos = conn.execute("""
-            SELECT
-                p.id_producto AS id,
-                p.nombre,
-                p.precio,
-                COALESCE(a.cantidad, 0) AS stock,
-                p.imagen,
-                p.fk_categoria,
-                c.nombre AS categoria_nombre
-            FROM producto p
-            JOIN categoria c ON p.fk_categoria = c.id_categoria
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            WHERE c.nombre = ?
-            ORDER BY p.id_producto DESC
-        """, (cliente_sucursal_id, categoria_filtro)).fetchall()
-    elif busqueda:
-        # Solo búsqueda
-        productos = conn.execute("""
-            SELECT
-                p.id_producto AS id,
-                p.nombre,
-                p.precio,
-                COALESCE(a.cantidad, 0) AS stock,
-                p.imagen,
-                p.fk_categoria,
-                c.nombre AS categoria_nombre
-            FROM producto p
-            JOIN categoria c ON p.fk_categoria = c.id_categoria
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            WHERE p.nombre LIKE ?
-            ORDER BY p.id_producto DESC
-        """, (cliente_sucursal_id, '%' + busqueda + '%')).fetchall()
-    else:
-        # Sin filtros
-        productos = conn.execute("""
-            SELECT
-                p.id_producto AS id,
-                p.nombre,
-                p.precio,
-                COALESCE(a.cantidad, 0) AS stock,
-                p.imagen,
-                p.fk_categoria,
-                c.nombre AS categoria_nombre
-            FROM producto p
-            JOIN categoria c ON p.fk_categoria = c.id_categoria
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            ORDER BY p.id_producto DESC
-        """, (cliente_sucursal_id,)).fetchall()
-
-    productos_con_imagen = []
-    for p in productos:
-        producto_dict = dict(p)
-        if producto_dict['imagen']:
-            producto_dict['imagen_base64'] = base64.b64encode(producto_dict['imagen']).decode('utf-8')
-        else:
-            producto_dict['imagen_base64'] = None
-        productos_con_imagen.append(producto_dict)
-
-    conn.close()
-
-    return render_template('index.html',
-                        productos=productos_con_imagen,
+    # Con FTS5 las búsquedas se ordenan por relevancia y el cursor lleva
+    # también el rank del último producto; sin búsqueda, por más recientes.
+    por_relevancia = fts_enabled() and fts_query(busqueda) is not None
+    if por_relevancia and rango is None:
+        despues = None
+
+    # Se pide uno de más para saber si hay otra página sin contar el total.
+    consulta = (CatalogQuery(cliente_sucursal_id, imagen=True, fts=fts_enabled(), stock=False)
+                .categoria(categoria_filtro)
+                .buscar(busqueda)
+                .ordenar('relevancia')
+                .despues(despues, rango)
+                .paginar(limite + 1))
+    # La página no depende de la sucursal: se reutiliza mientras no cambien
+    # los productos ni las categorías, y el stock se completa del StockLedger.
+    productos = catalog_cache().get_or_load(
+        conn,
+        (categoria_filtro, busqueda, despues, rango, limite),
+        ('producto', 'categoria'),
+        lambda: [dict(p) for p in consulta.all(conn)])
+    stock = stock_ledger().get_many(conn, cliente_sucursal_id, [p['id'] for p in productos])
+    productos = [dict(p, stock=s) for p, s in zip(productos, stock)]
+
+    siguiente = siguiente_fragmento = None
+    if len(productos) > limite:
+        productos = productos[:limite]
+        args = dict(categoria=categoria_filtro, q=busqueda or None,
+                    despues=productos[-1]['id'], por_pagina=por_pagina,
+                    rango=productos[-1]['rango'] if por_relevancia else None)
+        siguiente = url_for('main.home', **args)
+        siguiente_fragmento = url_for('main.home', fragmento=1, **args)
+
+    if fragmento:
+        resp = make_response(render_template('_catalogo_productos.html', productos=productos))
+        if siguiente_fragmento:
+            resp.headers['X-Siguiente'] = siguiente_fragmento
+        return with_etag(resp, etag)
+
+    categorias_lista = listar_categorias(conn)
+
+    return with_etag(render_template('index.html',
+                        productos=productos,
+                        siguiente=siguiente,
+                        siguiente_fragmento=siguiente_fragmento,
                         categorias=categorias_lista,
                         categoria_actual=categoria_filtro,
                         busqueda_actual=busqueda,
                         sucursales=sucursales,
-                        cliente_sucursal_id=cliente_sucursal_id)
+                        cliente_sucursal_id=cliente_sucursal_id), etag)
+
+@main_bp.get('/api/sugerencias')
+@sql_budget(0)
+def api_sugerencias():
+    """Autocompletado del buscador desde el índice en memoria (sin SQL)."""
+    indice = suggestion_index()
+    indice.refresh_if_stale(current_app._get_current_object(), current_app.config['SUGERENCIAS_TTL'])
+    limite = min(max(request.args.get('limite', 8, type=int), 1), 20)
+    resp = jsonify(q=request.args.get('q', ''), **indice.suggest(request.args.get('q', ''), limite))
+    resp.cache_control.private = True
+    resp.cache_control.max_age = 60
+    return resp
+
+@main_bp.get('/producto/<int:id_producto>/imagen')
+@main_bp.get('/producto/<int:id_producto>/imagen/<variante>')
+@sql_budget(3)
+def producto_imagen(id_producto, variante=None):
+    """Imagen del producto o una de sus VARIANTES. Con ?v=<versión> actual
+    se cachea como inmutable. Si la variante todavía no se generó, se sirve
+    la imagen original, que se revalida: la URL va a ser la de la variante
+    cuando se genere."""
+    if variante is not None and variante not in VARIANTES:
+        abort(404)
+    conn = get_conn()
+
+    # Si el navegador ya tiene una versión, se valida sin leer el BLOB.
+    if request.if_none_match:
+        fila = conn.execute("""
+            SELECT p.imagen_version, v.variante
+            FROM producto p
+            LEFT JOIN producto_imagen_variante v
+                ON v.fk_producto = p.id_producto AND v.variante = ?
+                AND v.imagen_version = p.imagen_version
+            WHERE p.id_producto = ? AND (p.imagen IS NOT NULL OR p.imagen_hash IS NOT NULL)
+        """, (variante, id_producto)).fetchone()
+        if not fila:
+            abort(404)
+        etag = image_etag(id_producto, fila['imagen_version'], fila['variante'])
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+            return _cachear_imagen(resp, etag, fila['imagen_version'],
+                                   inmutable=variante is None or fila['variante'] is not None)
+
+    if variante is not None:
+        fila = conn.execute("""
+            SELECT v.datos, v.mimetype, v.imagen_version
+            FROM producto_imagen_variante v
+            JOIN producto p ON p.id_producto = v.fk_producto AND p.imagen_version = v.imagen_version
+            WHERE v.fk_producto = ? AND v.variante = ?
+        """, (id_producto, variante)).fetchone()
+        if fila:
+            resp = Response(fila['datos'], mimetype=fila['mimetype'])
+            etag = image_etag(id_producto, fila['imagen_version'], variante)
+            return _cachear_imagen(resp, etag, fila['imagen_version'])
+
+    # Las imágenes ya migradas están en el store; las viejas siguen en el BLOB.
+    fila = conn.execute("""
+        SELECT imagen_hash, imagen_version,
+            CASE WHEN imagen_hash IS NULL THEN imagen END AS imagen
+        FROM producto
+        WHERE id_producto = ? AND (imagen IS NOT NULL OR imagen_hash IS NOT NULL)
+    """, (id_producto,)).fetchone()
+    if not fila:
+        abort(404)
+
+    if fila['imagen_hash']:
+        resp = store_response(fila['imagen_hash'])
+    else:
+        resp = Response(fila['imagen'], mimetype=image_mimetype(fila['imagen']))
+    return _cachear_imagen(resp, image_etag(id_producto, fila['imagen_version']), fila['imagen_version'],
+                           inmutable=variante is None)
+
+def _cachear_imagen(resp, etag, version, inmutable=True):
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    if inmutable and request.args.get('v') == str(version):
+        resp.cache_control.no_cache = None
+        resp.cache_control.max_age = CACHE_SEGUNDOS
+        resp.cache_control.immutable = True
+    else:
+        # Sin versión (o vieja) en la URL, o la original en lugar de una
+        # variante: cachea, pero revalida con el ETag.
+        resp.cache_control.no_cache = True
+    return resp
 
 @main_bp.route('/cambiar-sucursal', methods=['POST'])
 def cambiar_sucursal():
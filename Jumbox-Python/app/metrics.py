@@ -0,0 +1,184 @@
+import bisect
+import threading
+import time
+from flask import (g, request, session, abort, has_app_context, before_render_template, template_rendered,
+                   Response)
+
+from app.db import add_sql_listener
+from app.queries import query_timings
+
+# Límites (en segundos o en cantidad) de los buckets de cada histograma.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    """Histograma acumulativo por etiqueta, al estilo de Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, etiqueta, valor):
+        serie = self.series.get(etiqueta)
+        if serie is None:
+            serie = self.series[etiqueta] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def render(self, nombre, label):
+        lineas = []
+        for etiqueta, (conteos, suma, total) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                lineas.append(f'{nombre}_bucket{{{label}="{etiqueta}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{nombre}_bucket{{{label}="{etiqueta}",le="+Inf"}} {total}')
+            lineas.append(f'{nombre}_sum{{{label}="{etiqueta}"}} {suma:.6f}')
+            lineas.append(f'{nombre}_count{{{label}="{etiqueta}"}} {total}')
+        return lineas
+
+
+class Metrics:
+    """Métricas de requests, SQL y templates de la app.
+
+    Los tiempos se acumulan en g durante el request y se vuelcan una sola vez
+    al final, con un único lock, para no sumar costo a cada sentencia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia = Histogram(LATENCY_BUCKETS)
+        self.sql_por_request = Histogram(SQL_COUNT_BUCKETS)
+        self.sql_segundos = {}
+        self.render_segundos = {}
+        self.requests = {}
+
+    # --- hooks ---------------------------------------------------------
+
+    def on_sql(self, sql, params, segundos):
+        if has_app_context():
+            g.metrics_sql = g.get("metrics_sql", 0) + 1
+            g.metrics_sql_segundos = g.get("metrics_sql_segundos", 0.0) + segundos
+
+    def before_request(self):
+        g.metrics_inicio = time.perf_counter()
+
+    def after_request(self, response):
+        endpoint = request.endpoint or "sin_ruta"
+        with self._lock:
+            clave = (endpoint, response.status_code)
+            self.requests[clave] = self.requests.get(clave, 0) + 1
+        return response
+
+    def teardown_request(self, exc=None):
+        inicio = g.pop("metrics_inicio", None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        endpoint = request.endpoint or "sin_ruta"
+        sentencias = g.pop("metrics_sql", 0)
+        sql_segundos = g.pop("metrics_sql_segundos", 0.0)
+        with self._lock:
+            self.latencia.observe(endpoint, duracion)
+            self.sql_por_request.observe(endpoint, sentencias)
+            self.sql_segundos[endpoint] = self.sql_segundos.get(endpoint, 0.0) + sql_segundos
+
+    def before_render(self, app, template, context, **extra):
+        g.setdefault("metrics_render", []).append(time.perf_counter())
+
+    def rendered(self, app, template, context, **extra):
+        pila = g.get("metrics_render")
+        if not pila:
+            return
+        duracion = time.perf_counter() - pila.pop()
+        nombre = template.name or "sin_nombre"
+        with self._lock:
+            total = self.render_segundos.get(nombre, [0, 0.0])
+            total[0] += 1
+            total[1] += duracion
+            self.render_segundos[nombre] = total
+
+    # --- exposición ----------------------------------------------------
+
+    def render(self, pools, caches=None):
+        """Texto en formato de exposición de Prometheus."""
+        lineas = []
+        with self._lock:
+            lineas += ["# HELP jumbox_request_duration_seconds Latencia de los requests por endpoint.",
+                       "# TYPE jumbox_request_duration_seconds histogram"]
+            lineas += self.latencia.render("jumbox_request_duration_seconds", "endpoint")
+            lineas += ["# HELP jumbox_requests_total Requests atendidos por endpoint y status.",
+                       "# TYPE jumbox_requests_total counter"]
+            for (endpoint, status), n in sorted(self.requests.items()):
+                lineas.append(f'jumbox_requests_total{{endpoint="{endpoint}",status="{status}"}} {n}')
+            lineas += ["# HELP jumbox_request_sql_statements Sentencias SQL por request.",
+                       "# TYPE jumbox_request_sql_statements histogram"]
+            lineas += self.sql_por_request.render("jumbox_request_sql_statements", "endpoint")
+            lineas += ["# HELP jumbox_sql_seconds_total Tiempo total en SQL por endpoint.",
+                       "# TYPE jumbox_sql_seconds_total counter"]
+            for endpoint, segundos in sorted(self.sql_segundos.items()):
+                lineas.append(f'jumbox_sql_seconds_total{{endpoint="{endpoint}"}} {segundos:.6f}')
+            lineas += ["# HELP jumbox_template_render_seconds Tiempo de render_template por template.",
+                       "# TYPE jumbox_template_render_seconds summary"]
+            for nombre, (n, segundos) in sorted(self.render_segundos.items()):
+                lineas.append(f'jumbox_template_render_seconds_sum{{template="{nombre}"}} {segundos:.6f}')
+                lineas.append(f'jumbox_template_render_seconds_count{{template="{nombre}"}} {n}')
+
+        lineas += ["# HELP jumbox_query_seconds Tiempo de las consultas con nombre (app.queries).",
+                   "# TYPE jumbox_query_seconds summary"]
+        for nombre, t in sorted(query_timings().items()):
+            lineas.append(f'jumbox_query_seconds_sum{{query="{nombre}"}} {t["total"]:.6f}')
+            lineas.append(f'jumbox_query_seconds_count{{query="{nombre}"}} {t["cantidad"]}')
+
+        lineas += ["# HELP jumbox_db_pool_connections Conexiones del pool por estado.",
+                   "# TYPE jumbox_db_pool_connections gauge"]
+        esperas = []
+        for nombre, pool in pools:
+            s = pool.stats()
+            for estado in ("size", "abiertas", "en_uso", "libres"):
+                lineas.append(f'jumbox_db_pool_connections{{pool="{nombre}",estado="{estado}"}} {s[estado]}')
+            esperas.append((nombre, s))
+        lineas += ["# HELP jumbox_db_pool_wait_seconds Espera para obtener una conexión del pool.",
+                   "# TYPE jumbox_db_pool_wait_seconds summary"]
+        for nombre, s in esperas:
+            lineas.append(f'jumbox_db_pool_wait_seconds_sum{{pool="{nombre}"}} {s["espera_total"]:.6f}')
+            lineas.append(f'jumbox_db_pool_wait_seconds_count{{pool="{nombre}"}} {s["checkouts"]}')
+
+        lineas += ["# HELP jumbox_cache_requests_total Búsquedas en los caches en memoria.",
+                   "# TYPE jumbox_cache_requests_total counter"]
+        tamanios = []
+        for nombre, cache in sorted((caches or {}).items()):
+            s = cache.stats()
+            lineas.append(f'jumbox_cache_requests_total{{cache="{nombre}",resultado="acierto"}} {s["aciertos"]}')
+            lineas.append(f'jumbox_cache_requests_total{{cache="{nombre}",resultado="fallo"}} {s["fallos"]}')
+            tamanios.append((nombre, s["entradas"]))
+        lineas += ["# HELP jumbox_cache_entries Entradas en cada cache en memoria.",
+                   "# TYPE jumbox_cache_entries gauge"]
+        for nombre, entradas in tamanios:
+            lineas.append(f'jumbox_cache_entries{{cache="{nombre}"}} {entradas}')
+        return "\n".join(lineas) + "\n"
+
+
+def init_app(app):
+    """Instala la medición de requests, SQL y templates. Con METRICS_ENDPOINT
+    expone /metrics, solo para admins y las IP de METRICS_ALLOWED_IPS."""
+    metrics = Metrics()
+    app.extensions["metrics"] = metrics
+
+    add_sql_listener(app, metrics.on_sql)
+    app.before_request(metrics.before_request)
+    app.after_request(metrics.after_request)
+    app.teardown_request(metrics.teardown_request)
+    before_render_template.connect(metrics.before_render, app)
+    template_rendered.connect(metrics.rendered, app)
+
+    def metrics_view():
+        if session.get("tipo") != "admin" and request.remote_addr not in app.config["METRICS_ALLOWED_IPS"]:
+            abort(403)
+        pools = [("escritura", app.extensions["db_pool"]), ("lectura", app.extensions["db_pool_ro"])]
+        return Response(metrics.render(pools, app.extensions.get("caches")), mimetype="text/plain; version=0.0.4")
+
+    if app.config.get("METRICS_ENDPOINT"):
+        app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,395 @@
+import sqlite3
+
+
+def _producto_fts(conn):
+    """Índice FTS5 de productos (nombre y categoría), sin acentos y con
+    prefijos de 2 y 3 letras. Si el SQLite no trae FTS5 no se crea y la
+    búsqueda sigue usando LIKE."""
+    try:
+        conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS producto_fts USING fts5(
+          nombre, categoria,
+          tokenize = 'unicode61 remove_diacritics 2',
+          prefix = '2 3'
+        )""")
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return
+    # El nombre pesa más que la categoría en el ranking.
+    conn.execute("INSERT INTO producto_fts (producto_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0)')")
+    conn.execute("""
+        INSERT INTO producto_fts (rowid, nombre, categoria)
+        SELECT p.id_producto, p.nombre, c.nombre
+        FROM producto p LEFT JOIN categoria c ON c.id_categoria = p.fk_categoria
+    """)
+    for sql in (
+        """CREATE TRIGGER IF NOT EXISTS producto_fts_insert AFTER INSERT ON producto BEGIN
+          INSERT INTO producto_fts (rowid, nombre, categoria)
+          VALUES (NEW.id_producto, NEW.nombre,
+                  (SELECT nombre FROM categoria WHERE id_categoria = NEW.fk_categoria));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS producto_fts_update
+        AFTER UPDATE OF nombre, fk_categoria ON producto BEGIN
+          DELETE FROM producto_fts WHERE rowid = OLD.id_producto;
+          INSERT INTO producto_fts (rowid, nombre, categoria)
+          VALUES (NEW.id_producto, NEW.nombre,
+                  (SELECT nombre FROM categoria WHERE id_categoria = NEW.fk_categoria));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS producto_fts_delete AFTER DELETE ON producto BEGIN
+          DELETE FROM producto_fts WHERE rowid = OLD.id_producto;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS producto_fts_categoria
+        AFTER UPDATE OF nombre ON categoria BEGIN
+          UPDATE producto_fts SET categoria = NEW.nombre
+          WHERE rowid IN (SELECT id_producto FROM producto WHERE fk_categoria = NEW.id_categoria);
+        END""",
+    ):
+        conn.execute(sql)
+
+
+# Cada migración es una lista de sentencias (o funciones que reciben la
+# conexión). Su número es la posición en la lista (la primera es la 1) y
+# queda guardado en PRAGMA user_version.
+# Nunca modificar una migración ya publicada: agregar una nueva al final.
+MIGRATIONS = [
+    # 1: esquema base, igual al de bd.jumbox.py (no toca bases ya creadas)
+    [
+        """CREATE TABLE IF NOT EXISTS categoria (
+          id_categoria INTEGER PRIMARY KEY AUTOINCREMENT,
+          nombre TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS cliente (
+          id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+          nombre TEXT NOT NULL,
+          direccion TEXT NOT NULL,
+          telefono INTEGER NOT NULL UNIQUE,
+          contrasena TEXT,
+          tipo TEXT DEFAULT 'usuario'
+        )""",
+        """CREATE TABLE IF NOT EXISTS sucursal (
+          id_sucursal INTEGER PRIMARY KEY AUTOINCREMENT,
+          fk_cliente INTEGER)""",
+        """CREATE TABLE IF NOT EXISTS producto (
+          id_producto INTEGER PRIMARY KEY AUTOINCREMENT,
+          nombre TEXT NOT NULL,
+          precio REAL NOT NULL,
+          stock INTEGER NOT NULL,
+          fk_categoria INTEGER NOT NULL, imagen BLOB,
+          FOREIGN KEY (fk_categoria) REFERENCES categoria(id_categoria)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS carrito (
+          id_carrito INTEGER PRIMARY KEY AUTOINCREMENT,
+          fk_cliente INTEGER NOT NULL,
+          FOREIGN KEY (fk_cliente) REFERENCES cliente(id_cliente)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS "pedido" (
+          id_pedido INTEGER PRIMARY KEY AUTOINCREMENT,
+          fecha TEXT NOT NULL,
+          estado TEXT NOT NULL,
+          fk_cliente INTEGER NOT NULL,
+          fk_sucursal INTEGER,
+          FOREIGN KEY (fk_cliente) REFERENCES cliente(id_cliente)
+            ON DELETE NO ACTION ON UPDATE NO ACTION,
+          FOREIGN KEY (fk_sucursal) REFERENCES cliente(id_cliente)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS "pedido_reposicion" (
+          id_pedido_reposicion INTEGER PRIMARY KEY AUTOINCREMENT,
+          fecha TEXT NOT NULL,
+          fk_sucursal INTEGER NOT NULL,
+          FOREIGN KEY (fk_sucursal) REFERENCES cliente(id_cliente)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS "detalles_pedido" (
+          id_detalles_pedido INTEGER PRIMARY KEY AUTOINCREMENT,
+          cantidad INTEGER NOT NULL,
+          fk_producto INTEGER NOT NULL,
+          fk_pedido INTEGER NOT NULL,
+          FOREIGN KEY (fk_producto) REFERENCES producto(id_producto)
+            ON DELETE NO ACTION ON UPDATE NO ACTION,
+          FOREIGN KEY (fk_pedido) REFERENCES pedido(id_pedido)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS "detalle_pedido_reposicion" (
+          id_detalle_pedido_reposicion INTEGER PRIMARY KEY AUTOINCREMENT,
+          cantidad INTEGER NOT NULL,
+          fk_pedido_reposicion INTEGER NOT NULL,
+          fk_producto INTEGER NOT NULL,
+          FOREIGN KEY (fk_pedido_reposicion) REFERENCES pedido_reposicion(id_pedido_reposicion)
+            ON DELETE NO ACTION ON UPDATE NO ACTION,
+          FOREIGN KEY (fk_producto) REFERENCES producto(id_producto)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS producto_carrito (
+          id_producto_carrito INTEGER PRIMARY KEY AUTOINCREMENT,
+          fk_producto INTEGER NOT NULL,
+          fk_carrito INTEGER NOT NULL,
+          cantidad INTEGER NOT NULL DEFAULT 1,
+          FOREIGN KEY (fk_producto) REFERENCES producto(id_producto)
+            ON DELETE NO ACTION ON UPDATE NO ACTION,
+          FOREIGN KEY (fk_carrito) REFERENCES carrito(id_carrito)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+        """CREATE TABLE IF NOT EXISTS "almacen_sucursal" (
+          id_almacen_sucursal INTEGER PRIMARY KEY AUTOINCREMENT,
+          fk_sucursal INTEGER NOT NULL,
+          fk_producto INTEGER NOT NULL,
+          cantidad INTEGER NOT NULL DEFAULT 0,
+          UNIQUE (fk_sucursal, fk_producto),
+          FOREIGN KEY (fk_sucursal) REFERENCES cliente(id_cliente)
+            ON DELETE NO ACTION ON UPDATE NO ACTION,
+          FOREIGN KEY (fk_producto) REFERENCES producto(id_producto)
+            ON DELETE NO ACTION ON UPDATE NO ACTION
+        )""",
+    ],
+    # 2: índices sobre las claves foráneas que se filtran en cada request
+    [
+        "CREATE INDEX IF NOT EXISTS idx_producto_carrito_carrito ON producto_carrito (fk_carrito, fk_producto)",
+        "CREATE INDEX IF NOT EXISTS idx_carrito_cliente ON carrito (fk_cliente)",
+        "CREATE INDEX IF NOT EXISTS idx_detalles_pedido_pedido ON detalles_pedido (fk_pedido)",
+        "CREATE INDEX IF NOT EXISTS idx_pedido_cliente ON pedido (fk_cliente)",
+        "CREATE INDEX IF NOT EXISTS idx_pedido_sucursal ON pedido (fk_sucursal)",
+        "CREATE INDEX IF NOT EXISTS idx_pedido_reposicion_sucursal ON pedido_reposicion (fk_sucursal)",
+        "CREATE INDEX IF NOT EXISTS idx_detalle_pedido_reposicion_pedido "
+        "ON detalle_pedido_reposicion (fk_pedido_reposicion)",
+        "CREATE INDEX IF NOT EXISTS idx_producto_categoria ON producto (fk_categoria)",
+        "CREATE INDEX IF NOT EXISTS idx_categoria_nombre ON categoria (nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_cliente_tipo ON cliente (tipo)",
+    ],
+    # 3: índices cubrientes para el historial de compras y las estadísticas
+    [
+        # mis_compras / pedidos de sucursal: detalle del pedido sin ir a la tabla
+        "CREATE INDEX IF NOT EXISTS idx_detalles_pedido_pedido_cubre "
+        "ON detalles_pedido (fk_pedido, fk_producto, cantidad)",
+        "DROP INDEX IF EXISTS idx_detalles_pedido_pedido",
+        # productos más vendidos: agrupa por producto leyendo solo el índice
+        "CREATE INDEX IF NOT EXISTS idx_detalles_pedido_producto_cubre "
+        "ON detalles_pedido (fk_producto, cantidad)",
+        # estadísticas por sucursal
+        "CREATE INDEX IF NOT EXISTS idx_pedido_sucursal_cubre ON pedido (fk_sucursal, id_pedido)",
+        "DROP INDEX IF EXISTS idx_pedido_sucursal",
+        # stock por sucursal sin leer la tabla almacen_sucursal
+        "CREATE INDEX IF NOT EXISTS idx_almacen_sucursal_cubre "
+        "ON almacen_sucursal (fk_sucursal, fk_producto, cantidad)",
+    ],
+    # 4: versión de la imagen del producto, para la URL y el ETag de /producto/<id>/imagen
+    [
+        "ALTER TABLE producto ADD COLUMN imagen_version INTEGER NOT NULL DEFAULT 1",
+        """CREATE TRIGGER IF NOT EXISTS producto_imagen_version
+        AFTER UPDATE OF imagen ON producto
+        WHEN OLD.imagen IS NOT NEW.imagen
+        BEGIN
+          UPDATE producto SET imagen_version = OLD.imagen_version + 1
+          WHERE id_producto = NEW.id_producto;
+        END""",
+    ],
+    # 5: miniaturas y variantes WebP de la imagen de cada producto
+    [
+        """CREATE TABLE IF NOT EXISTS producto_imagen_variante (
+          fk_producto INTEGER NOT NULL,
+          variante TEXT NOT NULL,
+          imagen_version INTEGER NOT NULL,
+          mimetype TEXT NOT NULL,
+          datos BLOB NOT NULL,
+          PRIMARY KEY (fk_producto, variante),
+          FOREIGN KEY (fk_producto) REFERENCES producto(id_producto) ON DELETE CASCADE
+        )""",
+    ],
+    # 6: imágenes en el store en disco, referenciadas por su sha256
+    [
+        "ALTER TABLE producto ADD COLUMN imagen_hash TEXT",
+        """CREATE TRIGGER IF NOT EXISTS producto_imagen_hash_version
+        AFTER UPDATE OF imagen_hash ON producto
+        WHEN OLD.imagen_hash IS NOT NEW.imagen_hash
+        BEGIN
+          UPDATE producto SET imagen_version = imagen_version + 1
+          WHERE id_producto = NEW.id_producto;
+        END""",
+    ],
+    # 7: búsqueda full-text de productos
+    [
+        _producto_fts,
+    ],
+    # 8: contadores de cambios por tabla (y por sucursal para el stock), para
+    # invalidar los caches en memoria de cada worker
+    [
+        """CREATE TABLE IF NOT EXISTS contador_cambios (
+          clave TEXT PRIMARY KEY,
+          version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+    ] + [
+        f"""CREATE TRIGGER IF NOT EXISTS {tabla}_cambios_{evento.lower()}
+        AFTER {evento} ON {tabla} BEGIN
+          INSERT INTO contador_cambios (clave, version) VALUES ({clave}, 1)
+          ON CONFLICT (clave) DO UPDATE SET version = version + 1;
+        END"""
+        for tabla, evento, clave in [
+            ("producto", "INSERT", "'producto'"),
+            ("producto", "UPDATE", "'producto'"),
+            ("producto", "DELETE", "'producto'"),
+            ("categoria", "INSERT", "'categoria'"),
+            ("categoria", "UPDATE", "'categoria'"),
+            ("categoria", "DELETE", "'categoria'"),
+            ("almacen_sucursal", "INSERT", "'almacen:' || NEW.fk_sucursal"),
+            ("almacen_sucursal", "UPDATE", "'almacen:' || NEW.fk_sucursal"),
+            ("almacen_sucursal", "DELETE", "'almacen:' || OLD.fk_sucursal"),
+        ]
+    ],
+    # 9: contador de cambios de sucursales (clientes de tipo 'sucursal')
+    [
+        f"""CREATE TRIGGER IF NOT EXISTS cliente_sucursales_{evento.lower()}
+        AFTER {evento} ON cliente WHEN {condicion} BEGIN
+          INSERT INTO contador_cambios (clave, version) VALUES ('sucursales', 1)
+          ON CONFLICT (clave) DO UPDATE SET version = version + 1;
+        END"""
+        for evento, condicion in [
+            ("INSERT", "NEW.tipo = 'sucursal'"),
+            ("UPDATE", "OLD.tipo = 'sucursal' OR NEW.tipo = 'sucursal'"),
+            ("DELETE", "OLD.tipo = 'sucursal'"),
+        ]
+    ],
+    # 10: versión de lo que muestra la tarjeta del producto en el catálogo,
+    # para el cache de fragmentos de los templates
+    [
+        "ALTER TABLE producto ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+        """CREATE TRIGGER IF NOT EXISTS producto_version
+        AFTER UPDATE OF nombre, precio, fk_categoria, imagen_version ON producto
+        WHEN OLD.nombre IS NOT NEW.nombre OR OLD.precio IS NOT NEW.precio
+          OR OLD.fk_categoria IS NOT NEW.fk_categoria OR OLD.imagen_version IS NOT NEW.imagen_version
+        BEGIN
+          UPDATE producto SET version = version + 1
+          WHERE id_producto = NEW.id_producto;
+        END""",
+    ],
+    # 11: versión de cada cliente (sus datos y sus pedidos), para el ETag de
+    # las páginas de compras y de almacén
+    [
+        "ALTER TABLE cliente ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+        """CREATE TRIGGER IF NOT EXISTS cliente_version
+        AFTER UPDATE OF nombre, direccion, telefono ON cliente
+        WHEN OLD.nombre IS NOT NEW.nombre OR OLD.direccion IS NOT NEW.direccion
+          OR OLD.telefono IS NOT NEW.telefono
+        BEGIN
+          UPDATE cliente SET version = version + 1
+          WHERE id_cliente = NEW.id_cliente;
+        END""",
+    ] + [
+        f"""CREATE TRIGGER IF NOT EXISTS pedido_cliente_version_{evento.lower()}
+        AFTER {evento} ON pedido BEGIN
+          UPDATE cliente SET version = version + 1
+          WHERE id_cliente = {fila}.fk_cliente;
+        END"""
+        for evento, fila in [("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")]
+    ],
+    # 12: momento (UTC, ISO 8601) del último cambio de cada producto, para
+    # /api/v1/productos?since=
+    [
+        "ALTER TABLE producto ADD COLUMN actualizado TEXT",
+        "UPDATE producto SET actualizado = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')",
+        "CREATE INDEX IF NOT EXISTS idx_producto_actualizado ON producto (actualizado)",
+        """CREATE TRIGGER IF NOT EXISTS producto_actualizado_insert
+        AFTER INSERT ON producto BEGIN
+          UPDATE producto SET actualizado = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+          WHERE id_producto = NEW.id_producto;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS producto_actualizado_update
+        AFTER UPDATE OF nombre, precio, fk_categoria, imagen_version ON producto
+        WHEN OLD.nombre IS NOT NEW.nombre OR OLD.precio IS NOT NEW.precio
+          OR OLD.fk_categoria IS NOT NEW.fk_categoria OR OLD.imagen_version IS NOT NEW.imagen_version
+        BEGIN
+          UPDATE producto SET actualizado = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+          WHERE id_producto = NEW.id_producto;
+        END""",
+    ],
+    # 13: nombre de categoría único (el catálogo filtra por nombre). Las
+    # categorías repetidas se unen en la de menor id.
+    [
+        """UPDATE producto SET fk_categoria = (
+          SELECT MIN(d.id_categoria) FROM categoria c JOIN categoria d ON d.nombre = c.nombre
+          WHERE c.id_categoria = producto.fk_categoria)
+        WHERE fk_categoria IN (
+          SELECT c.id_categoria FROM categoria c
+          WHERE EXISTS (SELECT 1 FROM categoria d WHERE d.nombre = c.nombre AND d.id_categoria < c.id_categoria))""",
+        """DELETE FROM categoria
+        WHERE EXISTS (SELECT 1 FROM categoria d
+                      WHERE d.nombre = categoria.nombre AND d.id_categoria < categoria.id_categoria)""",
+        "DROP INDEX IF EXISTS idx_categoria_nombre",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_categoria_nombre ON categoria (nombre)",
+    ],
+    # 14: el contador 'producto' sube solo con lo que muestra el catálogo; el
+    # stock del depósito (aprobación de reposiciones) no lo invalida
+    [
+        "DROP TRIGGER IF EXISTS producto_cambios_update",
+        """CREATE TRIGGER producto_cambios_update
+        AFTER UPDATE OF nombre, precio, fk_categoria, imagen_version ON producto BEGIN
+          INSERT INTO contador_cambios (clave, version) VALUES ('producto', 1)
+          ON CONFLICT (clave) DO UPDATE SET version = version + 1;
+        END""",
+    ],
+    # 15: los triggers de producto.actualizado no pisan un valor que la
+    # sentencia ya puso (los datos sintéticos lo escriben con su propio reloj,
+    # para ser reproducibles)
+    [
+        "DROP TRIGGER IF EXISTS producto_actualizado_insert",
+        "DROP TRIGGER IF EXISTS producto_actualizado_update",
+        """CREATE TRIGGER producto_actualizado_insert
+        AFTER INSERT ON producto WHEN NEW.actualizado IS NULL BEGIN
+          UPDATE producto SET actualizado = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+          WHERE id_producto = NEW.id_producto;
+        END""",
+        """CREATE TRIGGER producto_actualizado_update
+        AFTER UPDATE OF nombre, precio, fk_categoria, imagen_version ON producto
+        WHEN (OLD.nombre IS NOT NEW.nombre OR OLD.precio IS NOT NEW.precio
+          OR OLD.fk_categoria IS NOT NEW.fk_categoria OR OLD.imagen_version IS NOT NEW.imagen_version)
+          AND NEW.actualizado IS OLD.actualizado
+        BEGIN
+          UPDATE producto SET actualizado = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+          WHERE id_producto = NEW.id_producto;
+        END""",
+    ],
+]
+
+
+def schema_version(conn):
+    """Versión de esquema guardada en la base (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_name):
+    """Aplica en orden las migraciones pendientes y devuelve la versión final.
+
+    Cada migración corre en su propia transacción junto con el cambio de
+    user_version, así una base a medio migrar retoma donde quedó.
+    """
+    conn = sqlite3.connect(db_name, timeout=30.0, isolation_level=None)
+    try:
+        version = schema_version(conn)
+        for numero, sentencias in enumerate(MIGRATIONS, start=1):
+            if numero <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Otro worker pudo haber migrado mientras esperábamos el lock.
+                if schema_version(conn) >= numero:
+                    conn.execute("COMMIT")
+                    continue
+                for sql in sentencias:
+                    if callable(sql):
+                        sql(conn)
+                    else:
+                        conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {numero}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return schema_version(conn)
+    finally:
+        conn.close()
+
+
+def init_app(app):
+    """Lleva la base de la app a la última versión de esquema."""
+    migrate(app.config["DB_NAME"])
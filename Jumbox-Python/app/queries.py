@@ -0,0 +1,239 @@
+import threading
+import time
+
+from app.search import fts_query
+
+# Tiempos acumulados por nombre de consulta: nombre -> [cantidad, total, máximo]
+_tiempos = {}
+_tiempos_lock = threading.Lock()
+
+
+def run_query(conn, nombre, sql, params=()):
+    """Ejecuta la consulta, trae todas las filas y registra cuánto tardó."""
+    inicio = time.perf_counter()
+    filas = conn.execute(sql, params).fetchall()
+    duracion = time.perf_counter() - inicio
+    with _tiempos_lock:
+        registro = _tiempos.setdefault(nombre, [0, 0.0, 0.0])
+        registro[0] += 1
+        registro[1] += duracion
+        registro[2] = max(registro[2], duracion)
+    return filas
+
+
+def query_timings():
+    """Cantidad de ejecuciones y tiempos (total, promedio, máximo) por consulta."""
+    with _tiempos_lock:
+        return {
+            nombre: {"cantidad": n, "total": total, "promedio": total / n, "maximo": maximo}
+            for nombre, (n, total, maximo) in _tiempos.items()
+        }
+
+
+class CatalogQuery:
+    """Consulta del catálogo con el stock de una sucursal, armada por partes.
+
+    Los filtros siempre se agregan en el mismo orden y sus valores van como
+    parámetros, así cada combinación de filtros produce siempre el mismo texto
+    SQL y sqlite3 reutiliza la sentencia ya preparada.
+    """
+
+    ORDENES = {
+        "recientes": "p.id_producto DESC",
+        "nombre": "p.nombre",
+        "precio": "p.precio, p.id_producto",
+        # Solo con búsqueda FTS; sin ella se usa "recientes".
+        "relevancia": "f.rank, p.id_producto DESC",
+    }
+
+    def __init__(self, sucursal_id, imagen=False, fts=False, stock=True):
+        self.sucursal_id = sucursal_id
+        self.imagen = imagen
+        self.fts = fts
+        # Con stock=False no se une almacen_sucursal (el stock sale del StockLedger).
+        self.stock = stock
+        self._categoria = None
+        self._busqueda = None
+        self._orden = "recientes"
+        self._limite = None
+        self._offset = 0
+        self._despues = None
+        self._despues_rango = None
+        self._desde = None
+
+    def categoria(self, nombre):
+        self._categoria = nombre or None
+        return self
+
+    def buscar(self, texto):
+        self._busqueda = texto or None
+        return self
+
+    def ordenar(self, orden):
+        if orden not in self.ORDENES:
+            raise ValueError(f"Orden de catálogo desconocido: {orden}")
+        self._orden = orden
+        return self
+
+    def paginar(self, limite, offset=0):
+        self._limite = limite
+        self._offset = offset
+        return self
+
+    def despues(self, id_producto, rango=None):
+        """Paginación por clave (keyset): productos posteriores al cursor en el
+        orden "recientes", o en "relevancia" (rango es el rank del último).
+        A diferencia de OFFSET, la página cuesta lo mismo en cualquier punto
+        del catálogo."""
+        self._despues = id_producto
+        self._despues_rango = rango
+        return self
+
+    def desde(self, actualizado):
+        """Solo productos modificados después de actualizado (ISO 8601 UTC)."""
+        self._desde = actualizado
+        return self
+
+    def _match(self):
+        """Expresión MATCH si la búsqueda va por FTS5, None si no."""
+        return fts_query(self._busqueda) if self.fts and self._busqueda else None
+
+    def _orden_efectivo(self):
+        if self._orden == "relevancia" and self._match() is None:
+            return "recientes"
+        return self._orden
+
+    @property
+    def nombre(self):
+        """Nombre de la forma de la consulta, para los tiempos por consulta."""
+        partes = ["catalogo", self._orden_efectivo()]
+        if self._categoria:
+            partes.append("categoria")
+        if self._busqueda:
+            partes.append("fts" if self._match() else "q")
+        if self._despues is not None:
+            partes.append("despues")
+        if self._desde is not None:
+            partes.append("desde")
+        if self._limite is not None:
+            partes.append("paginado")
+        return ":".join(partes)
+
+    def build(self):
+        """Devuelve (sql, params) de la consulta."""
+        columnas = [
+            "p.id_producto AS id",
+            "p.nombre",
+            "p.precio",
+            "p.version",
+            "p.actualizado",
+            "p.fk_categoria",
+            "c.nombre AS categoria",
+        ]
+        if self.stock:
+            columnas.insert(3, "COALESCE(a.cantidad, 0) AS stock")
+        if self.imagen:
+            # Solo la versión (NULL si no hay imagen): la imagen se sirve aparte.
+            columnas.append("CASE WHEN p.imagen IS NULL AND p.imagen_hash IS NULL THEN NULL "
+                            "ELSE p.imagen_version END AS imagen_version")
+        match = self._match()
+        orden = self._orden_efectivo()
+        if match:
+            columnas.append("f.rank AS rango")
+
+        sql = ["SELECT " + ", ".join(columnas)]
+        if match:
+            sql += ["FROM producto_fts f", "JOIN producto p ON p.id_producto = f.rowid"]
+        else:
+            sql.append("FROM producto p")
+        sql.append("JOIN categoria c ON c.id_categoria = p.fk_categoria")
+        params = []
+        if self.stock:
+            sql.append("LEFT JOIN almacen_sucursal a ON a.fk_producto = p.id_producto AND a.fk_sucursal = ?")
+            params.append(self.sucursal_id)
+
+        condiciones = []
+        if match:
+            condiciones.append("producto_fts MATCH ?")
+            params.append(match)
+        elif self._busqueda:
+            # Base sin FTS5 (o sin migrar): búsqueda por subcadena.
+            condiciones.append("p.nombre LIKE ?")
+            params.append("%" + self._busqueda + "%")
+        if self._categoria:
+            # Sobre el JOIN: si hubiera nombres repetidos trae todas esas
+            # categorías. Como idx_categoria_nombre es UNIQUE, el planner sabe
+            # que es una sola y recorre idx_producto_categoria ya en orden de
+            # id (con IN (SELECT ...) ordenaría toda la categoría en cada página).
+            condiciones.append("c.nombre = ?")
+            params.append(self._categoria)
+        if self._despues is not None:
+            if orden == "relevancia" and self._despues_rango is not None:
+                condiciones.append("(f.rank > ? OR (f.rank = ? AND p.id_producto < ?))")
+                params.extend([self._despues_rango, self._despues_rango, self._despues])
+            elif orden == "recientes":
+                condiciones.append("p.id_producto < ?")
+                params.append(self._despues)
+            else:
+                raise ValueError(f"Cursor de paginación inválido para el orden '{orden}'.")
+        if self._desde is not None:
+            condiciones.append("p.actualizado > ?")
+            params.append(self._desde)
+        if condiciones:
+            sql.append("WHERE " + " AND ".join(condiciones))
+
+        sql.append("ORDER BY " + self.ORDENES[orden])
+        if self._limite is not None:
+            sql.append("LIMIT ? OFFSET ?")
+            params.extend([self._limite, self._offset])
+        return "\n".join(sql), params
+
+    def all(self, conn):
+        sql, params = self.build()
+        return run_query(conn, self.nombre, sql, params)
+
+    def iter(self, conn, tanda=500):
+        """Como all, pero trae las filas del cursor de a tandas: con un
+        resultado grande la memoria no crece con la cantidad de filas."""
+        sql, params = self.build()
+        cursor = conn.execute(sql, params)
+        while True:
+            filas = cursor.fetchmany(tanda)
+            if not filas:
+                return
+            yield from filas
+
+
+def catalog_shapes():
+    """Todas las formas posibles de CatalogQuery (para verificar sus planes)."""
+    consultas = []
+    for orden in CatalogQuery.ORDENES:
+        for categoria in (None, "x"):
+            for busqueda in (None, "x"):
+                for limite in (None, 1):
+                    q = CatalogQuery(1).ordenar(orden).categoria(categoria).buscar(busqueda)
+                    if limite:
+                        q.paginar(limite)
+                    consultas.append(q)
+                if orden == "recientes":
+                    consultas.append(CatalogQuery(1).categoria(categoria).buscar(busqueda)
+                                     .despues(1).paginar(1))
+        for categoria in (None, "x"):
+            for rango in (None, -1.0):
+                q = CatalogQuery(1, fts=True).ordenar("relevancia").categoria(categoria).buscar("x")
+                if rango is not None:
+                    q.despues(1, rango)
+                consultas.append(q.paginar(1))
+    # Las de /api/v1/productos.
+    for desde in (None, "x"):
+        for despues in (None, 1):
+            consultas.append(CatalogQuery(1, imagen=True).desde(desde).despues(despues).paginar(1))
+    # Las del inicio, sin stock (lo pone el StockLedger).
+    for busqueda in (None, "x"):
+        for despues in (None, 1):
+            q = (CatalogQuery(None, imagen=True, fts=True, stock=False)
+                 .buscar(busqueda).ordenar("relevancia").paginar(1))
+            if despues:
+                q.despues(despues, -1.0 if busqueda else None)
+            consultas.append(q)
+    return consultas
@@ -0,0 +1,179 @@
+import bisect
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+
+from flask import current_app
+
+_PALABRA_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(texto):
+    """Convierte lo que escribió el usuario en una expresión MATCH de FTS5.
+
+    Cada palabra se busca como prefijo ("azu" encuentra "azúcar") y todas
+    tienen que aparecer. Las comillas evitan que la sintaxis de FTS5 (AND,
+    NEAR, *, ...) llegue desde el buscador. Devuelve None si no hay palabras.
+    """
+    palabras = _PALABRA_RE.findall(texto or "")
+    if not palabras:
+        return None
+    return " ".join('"' + p.replace('"', '""') + '"*' for p in palabras)
+
+
+def fts_enabled(app=None):
+    """True si la base tiene producto_fts (migración 7 con FTS5 disponible)."""
+    return (app or current_app).extensions.get("producto_fts", False)
+
+
+def fold(texto):
+    """Minúsculas y sin acentos, igual que remove_diacritics de FTS5 ("Ñandú" -> "nandu")."""
+    descompuesto = unicodedata.normalize("NFD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class SuggestionIndex:
+    """Índice de prefijos en memoria para el autocompletado.
+
+    Guarda cada palabra (normalizada con fold) de los nombres de productos y
+    categorías en una lista ordenada; un prefijo se resuelve con bisect sin
+    tocar la base. Las palabras se internan porque se repiten mucho entre
+    productos.
+    """
+
+    # Coincidencias que se miran como máximo antes de ordenar por relevancia.
+    CANDIDATOS = 400
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claves = []
+        self._refs = array("l")
+        self._items = []        # (tipo, id, nombre, nombre normalizado)
+        self._posicion = {}     # (tipo, id) -> índice en _items
+        self.construido = 0.0
+        self._reconstruyendo = False
+
+    # --- carga -----------------------------------------------------------
+
+    def rebuild(self, conn):
+        """Arma el índice completo desde producto y categoria."""
+        items = [("categoria", r[0], r[1], fold(r[1]))
+                 for r in conn.execute("SELECT id_categoria, nombre FROM categoria")]
+        items += [("producto", r[0], r[1], fold(r[1]))
+                  for r in conn.execute("SELECT id_producto, nombre FROM producto")]
+        pares = sorted((clave, i) for i, item in enumerate(items) for clave in self._palabras(item[3]))
+        with self._lock:
+            self._items = items
+            self._posicion = {(item[0], item[1]): i for i, item in enumerate(items)}
+            self._claves = [clave for clave, _ in pares]
+            self._refs = array("l", (i for _, i in pares))
+            self.construido = time.monotonic()
+
+    def update(self, tipo, id_item, nombre):
+        """Agrega o reemplaza un producto/categoría sin rearmar todo el índice."""
+        nuevo = (tipo, id_item, nombre, fold(nombre))
+        with self._lock:
+            i = self._posicion.get((tipo, id_item))
+            if i is None:
+                i = len(self._items)
+                self._items.append(nuevo)
+                self._posicion[(tipo, id_item)] = i
+            else:
+                for clave in self._palabras(self._items[i][3]):
+                    self._quitar(clave, i)
+                self._items[i] = nuevo
+            for clave in self._palabras(nuevo[3]):
+                pos = bisect.bisect_right(self._claves, clave)
+                self._claves.insert(pos, clave)
+                self._refs.insert(pos, i)
+
+    def _quitar(self, clave, i):
+        pos = bisect.bisect_left(self._claves, clave)
+        while pos < len(self._claves) and self._claves[pos] == clave:
+            if self._refs[pos] == i:
+                del self._claves[pos]
+                del self._refs[pos]
+                return
+            pos += 1
+
+    @staticmethod
+    def _palabras(normalizado):
+        return {sys.intern(p) for p in _PALABRA_RE.findall(normalizado)}
+
+    # --- consulta --------------------------------------------------------
+
+    def suggest(self, texto, limite=8):
+        """Productos y categorías cuyo nombre tiene palabras que empiezan con
+        las del texto. La última palabra puede estar incompleta."""
+        palabras = _PALABRA_RE.findall(fold(texto or ""))
+        if not palabras:
+            return {"productos": [], "categorias": []}
+        prefijo, resto = palabras[-1], palabras[:-1]
+        consulta = " ".join(palabras)
+
+        with self._lock:
+            inicio = bisect.bisect_left(self._claves, prefijo)
+            vistos, candidatos = set(), []
+            pos = inicio
+            while (pos < len(self._claves) and self._claves[pos].startswith(prefijo)
+                   and len(candidatos) < self.CANDIDATOS):
+                i = self._refs[pos]
+                if i not in vistos:
+                    vistos.add(i)
+                    candidatos.append(self._items[i])
+                pos += 1
+
+        def coincide(item):
+            nombre = item[3].split()
+            return all(any(p.startswith(q) for p in nombre) for q in resto)
+
+        def relevancia(item):
+            # Primero los que empiezan con lo escrito, después los más cortos.
+            return (not item[3].startswith(consulta), len(item[2]), item[3])
+
+        elegidos = sorted((item for item in candidatos if coincide(item)), key=relevancia)
+        return {
+            "productos": [{"id": item[1], "nombre": item[2]}
+                          for item in elegidos if item[0] == "producto"][:limite],
+            "categorias": [{"id": item[1], "nombre": item[2]}
+                           for item in elegidos if item[0] == "categoria"][:limite],
+        }
+
+    def refresh_if_stale(self, app, ttl):
+        """Con varios workers cada uno tiene su índice: cada ttl segundos se
+        rearma en un hilo aparte y mientras tanto se sigue usando el viejo."""
+        if self._reconstruyendo or time.monotonic() - self.construido < ttl:
+            return
+        self._reconstruyendo = True
+
+        def rearmar():
+            from app.db import get_db
+            try:
+                with app.app_context():
+                    self.rebuild(get_db(write=False))
+            finally:
+                self._reconstruyendo = False
+
+        threading.Thread(target=rearmar, name="sugerencias", daemon=True).start()
+
+
+def suggestion_index(app=None):
+    return (app or current_app).extensions["sugerencias"]
+
+
+def init_app(app):
+    """Detecta si la búsqueda puede usar FTS5 o tiene que caer en LIKE y arma
+    el índice de sugerencias."""
+    from app.db import get_db
+    indice = SuggestionIndex()
+    with app.app_context():
+        conn = get_db(write=True)
+        fila = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'producto_fts'"
+        ).fetchone()
+        indice.rebuild(conn)
+    app.extensions["producto_fts"] = fila is not None
+    app.extensions["sugerencias"] = indice
@@ -0,0 +1,101 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+from flask import request, session, has_request_context
+
+from app.db import add_sql_listener
+
+logger = logging.getLogger("jumbox.slow_query")
+
+_ESPACIOS_RE = re.compile(r"\s+")
+
+# Una sola cola y un solo hilo escritor por proceso, compartidos por todas las
+# apps: create_app() puede llamarse muchas veces (tests, benchmark).
+_cola = queue.SimpleQueue()
+_listener = None
+_handlers = {}
+_lock = threading.Lock()
+
+
+def param_shape(params):
+    """Forma de los parámetros sin sus valores: (int, str), {id: int} o many."""
+    if params is None:
+        return "many"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+def request_origin():
+    """Endpoint y sucursal del request actual (None fuera de un request)."""
+    if not has_request_context():
+        return None, None
+    if session.get("tipo") == "sucursal":
+        sucursal = session.get("id_cliente")
+    else:
+        sucursal = session.get("cliente_sucursal_id")
+    return request.endpoint, sucursal
+
+
+class _Destino(logging.Handler):
+    """Entrega cada registro al handler de la app que lo encoló."""
+
+    def emit(self, record):
+        record.destino.handle(record)
+
+
+def _iniciar_listener():
+    global _listener
+    with _lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_cola, _Destino())
+            _listener.start()
+            atexit.register(_listener.stop)
+
+
+def _handler(ruta):
+    """Un handler por destino (archivo o stderr), reutilizado entre apps."""
+    with _lock:
+        if ruta not in _handlers:
+            handler = logging.FileHandler(ruta, encoding="utf-8") if ruta else logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            _handlers[ruta] = handler
+        return _handlers[ruta]
+
+
+class SlowQueryLog:
+    """Registra las sentencias que superan el umbral, con su ruta de origen.
+
+    El request solo encola el registro (QueueHandler); el listener del módulo
+    lo escribe desde otro hilo, así el log no suma latencia.
+    """
+
+    def __init__(self, umbral_ms, handler):
+        self.umbral = umbral_ms / 1000.0
+        self.handler = handler
+        self._encolar = logging.handlers.QueueHandler(_cola)
+
+    def on_sql(self, sql, params, segundos):
+        if segundos < self.umbral:
+            return
+        endpoint, sucursal = request_origin()
+        registro = logger.makeRecord(
+            logger.name, logging.WARNING, __file__, 0,
+            "consulta lenta %.1f ms endpoint=%s sucursal=%s params=%s sql=%s",
+            (segundos * 1000, endpoint, sucursal, param_shape(params), _ESPACIOS_RE.sub(" ", sql).strip()),
+            None,
+        )
+        registro.destino = self.handler
+        self._encolar.handle(registro)
+
+
+def init_app(app):
+    """Activa el log de consultas lentas (SLOW_QUERY_MS, SLOW_QUERY_LOG)."""
+    handler = _handler(app.config.get("SLOW_QUERY_LOG"))
+    slow_log = SlowQueryLog(app.config.get("SLOW_QUERY_MS", 100), handler)
+    _iniciar_listener()
+    app.extensions["slow_query_log"] = slow_log
+    add_sql_listener(app, slow_log.on_sql)
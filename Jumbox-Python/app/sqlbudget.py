@@ -0,0 +1,94 @@
+import logging
+from collections import Counter
+from flask import current_app, g, request, has_request_context
+
+from app.db import add_sql_listener
+
+logger = logging.getLogger("jumbox.sql_budget")
+
+
+class SQLBudgetExceeded(RuntimeError):
+    """Un request ejecutó más sentencias que su presupuesto o repitió una (N+1)."""
+
+
+def sql_budget(maximo):
+    """Decorador de vista: máximo de sentencias SQL por request del endpoint."""
+    def decorador(vista):
+        vista.sql_budget = maximo
+        return vista
+    return decorador
+
+
+def budget_mode(app):
+    """'raise' en tests, 'warn' en debug y None (apagado) en producción,
+    salvo que SQL_BUDGET_MODE diga otra cosa."""
+    modo = app.config.get("SQL_BUDGET_MODE")
+    if modo:
+        return None if modo == "off" else modo
+    if app.testing:
+        return "raise"
+    if app.debug:
+        return "warn"
+    return None
+
+
+def on_sql(sql, params, segundos):
+    if has_request_context() and "sql_budget" in g:
+        g.sql_budget[sql] += 1
+        # executemany (params=None) es una sola sentencia en lote, no un N+1.
+        if params is not None:
+            g.sql_budget_repetibles.add(sql)
+
+
+def before_request():
+    if budget_mode(current_app):
+        g.sql_budget = Counter()
+        g.sql_budget_repetibles = set()
+
+
+def endpoint_budget(app, endpoint):
+    """Presupuesto del endpoint: SQL_BUDGETS (config) pisa al del decorador."""
+    presupuestos = app.config.get("SQL_BUDGETS") or {}
+    if endpoint in presupuestos:
+        return presupuestos[endpoint]
+    vista = app.view_functions.get(endpoint)
+    return getattr(vista, "sql_budget", None)
+
+
+def check(conteo, repetibles, presupuesto, umbral_n_mas_uno):
+    """Lista de problemas: presupuesto excedido y sentencias repetidas."""
+    problemas = []
+    total = sum(conteo.values())
+    if presupuesto is not None and total > presupuesto:
+        problemas.append(f"{total} sentencias SQL (presupuesto {presupuesto})")
+    for sql, veces in conteo.most_common():
+        if veces < umbral_n_mas_uno:
+            break
+        if sql in repetibles:
+            problemas.append(f"posible N+1: {veces} veces {' '.join(sql.split())[:120]}")
+    return problemas
+
+
+def after_request(response):
+    conteo = g.pop("sql_budget", None)
+    repetibles = g.pop("sql_budget_repetibles", set())
+    if conteo is None:
+        return response
+
+    app = current_app._get_current_object()
+    endpoint = request.endpoint
+    problemas = check(conteo, repetibles, endpoint_budget(app, endpoint),
+                      app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 3))
+    if problemas:
+        mensaje = f"{endpoint}: " + "; ".join(problemas)
+        if budget_mode(app) == "raise":
+            raise SQLBudgetExceeded(mensaje)
+        logger.warning(mensaje)
+    return response
+
+
+def init_app(app):
+    """Cuenta las sentencias de cada request y avisa excesos y patrones N+1."""
+    add_sql_listener(app, on_sql)
+    app.before_request(before_request)
+    app.after_request(after_request)
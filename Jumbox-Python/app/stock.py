@@ -0,0 +1,116 @@
+import threading
+from array import array
+
+from flask import current_app
+
+
+def stock_version(conn, sucursal_id):
+    """Versión actual del contador 'almacen:<sucursal>' leída de la base.
+
+    Dentro de una transacción de escritura incluye los cambios propios."""
+    fila = conn.execute("SELECT version FROM contador_cambios WHERE clave = ?",
+                        (f"almacen:{sucursal_id}",)).fetchone()
+    return fila[0] if fila else 0
+
+
+class StockLedger:
+    """Stock de cada sucursal en memoria, para validar cantidades y mostrar
+    disponibilidad sin consultar almacen_sucursal.
+
+    Cada sucursal es un array de enteros indexado por id de producto (0 si no
+    hay fila). Guarda la versión del contador 'almacen:<sucursal>' con la que
+    se cargó y se recarga cuando otro worker la cambia. Las escrituras de este
+    worker se aplican en el array (apply) sin recargar. Es solo un atajo: la
+    base sigue decidiendo al confirmar una compra.
+    """
+
+    def __init__(self, contadores):
+        self.contadores = contadores
+        self._stock = {}
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def load(self, conn, sucursal_id):
+        """Relee el stock de la sucursal desde la base."""
+        # La versión se lee antes que las filas: si algo cambia en el medio,
+        # queda vieja y la próxima lectura vuelve a cargar.
+        version = stock_version(conn, sucursal_id)
+        filas = conn.execute(
+            "SELECT fk_producto, cantidad FROM almacen_sucursal WHERE fk_sucursal = ?",
+            (sucursal_id,)).fetchall()
+        stock = array("i", bytes(4 * (max((f[0] for f in filas), default=0) + 1)))
+        for producto_id, cantidad in filas:
+            stock[producto_id] = cantidad
+        with self._lock:
+            self._stock[sucursal_id] = stock
+            self._versiones[sucursal_id] = version
+        return stock
+
+    def load_all(self, conn):
+        """Carga todas las sucursales (al arrancar)."""
+        for (sucursal_id,) in conn.execute("SELECT id_cliente FROM cliente WHERE tipo = 'sucursal'").fetchall():
+            self.load(conn, sucursal_id)
+
+    def _vigente(self, conn, sucursal_id):
+        stock = self._stock.get(sucursal_id)
+        (version,) = self.contadores.get(conn, f"almacen:{sucursal_id}")
+        if stock is None or version > self._versiones.get(sucursal_id, -1):
+            stock = self.load(conn, sucursal_id)
+        return stock
+
+    def get(self, conn, sucursal_id, producto_id):
+        """Unidades disponibles del producto en la sucursal."""
+        stock = self._vigente(conn, sucursal_id)
+        return stock[producto_id] if 0 <= producto_id < len(stock) else 0
+
+    def get_many(self, conn, sucursal_id, productos_ids):
+        """Lista con el stock de cada producto, en el mismo orden."""
+        stock = self._vigente(conn, sucursal_id)
+        tope = len(stock)
+        return [stock[i] if 0 <= i < tope else 0 for i in productos_ids]
+
+    def apply(self, sucursal_id, cambios, version, filas):
+        """Aplica cambios {producto: delta} ya confirmados por este worker.
+
+        version es la del contador leída en la misma transacción y filas
+        cuántas filas de almacen_sucursal se escribieron (cada una sube el
+        contador en 1). Si además hubo cambios de otros, se descarta la
+        sucursal y se recarga en la próxima lectura.
+        """
+        with self._lock:
+            stock = self._stock.get(sucursal_id)
+            if stock is None or self._versiones.get(sucursal_id) != version - filas:
+                self._stock.pop(sucursal_id, None)
+                self._versiones.pop(sucursal_id, None)
+                return
+            tope = max(cambios, default=0) + 1
+            if tope > len(stock):
+                stock.frombytes(bytes(stock.itemsize * (tope - len(stock))))
+            for producto_id, delta in cambios.items():
+                stock[producto_id] += delta
+            self._versiones[sucursal_id] = version
+
+
+def stock_ledger(app=None):
+    return (app or current_app).extensions["stock_ledger"]
+
+
+def stock_level(cantidad):
+    """'agotado', 'bajo' (hasta STOCK_BAJO unidades) o 'disponible'."""
+    if cantidad <= 0:
+        return "agotado"
+    if cantidad <= current_app.config.get("STOCK_BAJO", 5):
+        return "bajo"
+    return "disponible"
+
+
+def init_app(app):
+    """Carga el stock de todas las sucursales en memoria y expone
+    stock_nivel() a los templates."""
+    from app.cache import version_counters
+    from app.db import get_db
+    ledger = StockLedger(version_counters(app))
+    with app.app_context():
+        ledger.load_all(get_db(write=True))
+    app.extensions["stock_ledger"] = ledger
+    app.add_template_global(stock_level, "stock_nivel")
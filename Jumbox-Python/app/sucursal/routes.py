@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from datetime import date
 from app.utils import (get_conn, require_login_redirect, get_productos_sucursal)
+from app.cache import version_counters
+from app.conditional import not_modified, page_etag, with_etag
 
 sucursal_bp = Blueprint('sucursal', __name__, template_folder='../../templates/sucursal')
 
@@ -12,7 +14,7 @@ def panel_sucursal():
     if session.get('tipo') != 'sucursal':
         flash("No autorizado.", "error")
         return redirect(url_for('main.home'))
-    return render_template('panel_sucursal.html')
+    return render_template('sucursal/panel_sucursal.html')
 
 @sucursal_bp.route('/sucursal/almacen')
 def sucursal_almacen():
@@ -28,16 +30,23 @@ def sucursal_almacen():
     
     with get_conn() as conn:
         sucursal = conn.execute("""
-            SELECT nombre AS nombre, direccion AS direccion 
+            SELECT nombre AS nombre, direccion AS direccion, version
             FROM cliente 
             WHERE id_cliente = ?
         """, (cliente_sucursal_id,)).fetchone()
+
+        etag = page_etag(sucursal['version'] if sucursal else None,
+                         *version_counters().get(conn, 'producto', 'categoria',
+                                                 f'almacen:{cliente_sucursal_id}'))
+        resp = not_modified(etag)
+        if resp:
+            return resp
         
         productos = get_productos_sucursal(conn, cliente_sucursal_id)
     
-    return render_template('sucursal_almacen.html', 
+    return with_etag(render_template('sucursal/sucursal_almacen.html', 
                         sucursal=sucursal, 
-                        productos=productos)
+                        productos=productos), etag)
 
 @sucursal_bp.route('/sucursal/pedir-stock', methods=['GET', 'POST'])
 def sucursal_pedir_stock():
@@ -89,19 +98,9 @@ def sucursal_pedir_stock():
         
         sucursal_nombre = sucursal['nombre'] if sucursal else "Sucursal"
         
-        productos = conn.execute("""
-            SELECT 
-                p.id_producto,
-                p.nombre,
-                COALESCE(a.cantidad, 0) AS stock_actual
-            FROM producto p
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            ORDER BY p.nombre
-        """, (cliente_sucursal_id,)).fetchall()
+        productos = get_productos_sucursal(conn, cliente_sucursal_id)
     
-    return render_template('sucursal_pedir_stock.html', 
+    return render_template('sucursal/sucursal_pedir_stock.html', 
                         productos=productos,
                         sucursal_nombre=sucursal_nombre)
 
@@ -0,0 +1,238 @@
+import itertools
+import random
+import sqlite3
+import struct
+import time
+import zlib
+from datetime import date, datetime, timedelta
+
+import bcrypt
+
+from app.images import make_variants
+from app.migrations import migrate
+
+CATEGORIAS = [
+    "Almacén", "Bebidas", "Lácteos", "Carnes", "Frutas y Verduras", "Panadería",
+    "Congelados", "Limpieza", "Perfumería", "Bebés", "Mascotas", "Desayuno",
+    "Golosinas", "Electro",
+]
+PRODUCTOS = [
+    "Azúcar", "Arroz", "Fideos", "Harina", "Aceite", "Yerba", "Café", "Té", "Leche",
+    "Yogur", "Queso", "Manteca", "Galletitas", "Mermelada", "Dulce de leche", "Pan",
+    "Gaseosa", "Agua", "Jugo", "Cerveza", "Vino", "Detergente", "Lavandina", "Jabón",
+    "Shampoo", "Pañales", "Alimento balanceado", "Chocolate", "Caramelos", "Atún",
+    "Lentejas", "Garbanzos", "Tomate triturado", "Puré", "Pollo", "Carne picada",
+    "Milanesas", "Helado", "Papas fritas", "Manzana", "Banana", "Naranja",
+]
+VARIANTES = ["Clásico", "Light", "Integral", "Orgánico", "Sin TACC", "Premium", "Familiar", "Económico"]
+MARCAS = ["La Serenísima", "Marolio", "Arcor", "Molinos", "Ledesma", "Jumbox", "Cuisine & Co", "Natura"]
+TAMANIOS = ["250 g", "500 g", "1 kg", "1 L", "1,5 L", "2,25 L", "x6", "x12"]
+CALLES = ["Av. Corrientes", "Av. Santa Fe", "Av. Rivadavia", "Calle Florida", "Av. Cabildo", "Av. Mitre"]
+
+# Alfabeto del base64 de bcrypt.
+_BCRYPT_B64 = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+# Rango de teléfonos generados: no choca con los de las cuentas de prueba.
+TELEFONO_BASE = 1100000000
+
+DEFAULTS = {
+    "categorias": len(CATEGORIAS),
+    "productos": 5000,
+    "sucursales": 5,
+    "clientes": 10000,
+    "carritos": 2000,
+    "pedidos": 100000,
+    "detalles_por_pedido": 4,
+    "reposiciones": 5000,
+    "imagenes": 32,
+}
+
+
+def _png(r, g, b, lado=64):
+    """PNG de un solo color, armado a mano para no depender de Pillow."""
+    fila = b"\x00" + bytes((r, g, b)) * lado
+    datos = zlib.compress(fila * lado, 9)
+
+    def chunk(tipo, contenido):
+        cuerpo = tipo + contenido
+        return struct.pack(">I", len(contenido)) + cuerpo + struct.pack(">I", zlib.crc32(cuerpo))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", lado, lado, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", datos)
+            + chunk(b"IEND", b""))
+
+
+def _insert_many(conn, sql, filas, lote=50000):
+    """executemany por lotes, cada lote en una transacción."""
+    total = 0
+    filas = iter(filas)
+    while True:
+        bloque = list(itertools.islice(filas, lote))
+        if not bloque:
+            return total
+        conn.execute("BEGIN")
+        conn.executemany(sql, bloque)
+        conn.execute("COMMIT")
+        total += len(bloque)
+
+
+def _bcrypt_salt(seed, rondas):
+    rng = random.Random(f"bcrypt:{seed}")
+    cuerpo = "".join(rng.choice(_BCRYPT_B64) for _ in range(21))
+    # El último carácter aporta solo 2 bits: los otros 4 tienen que ser 0.
+    return f"$2b${rondas:02d}${cuerpo}{rng.choice('.Oeu')}".encode()
+
+
+def seeded_passwords(seed, rondas=12):
+    """Hashes bcrypt de las contraseñas de prueba (Admin1234, Sucursal1111 y
+    Usuario1234) con una sal derivada de la semilla, así la misma semilla da
+    la misma base byte a byte."""
+    salt = _bcrypt_salt(seed, rondas)
+    return {
+        tipo: bcrypt.hashpw(contra.encode("utf-8"), salt).decode("utf-8")
+        for tipo, contra in (("admin", "Admin1234"), ("sucursal", "Sucursal1111"), ("usuario", "Usuario1234"))
+    }
+
+
+def generate(db_name, counts=None, seed=1, passwords=None, log=print, store=None):
+    """Llena una base nueva con datos sintéticos reproducibles.
+
+    counts sobreescribe las cantidades de DEFAULTS. passwords es un dict
+    tipo -> hash de contraseña ('usuario', 'sucursal', 'admin'); el admin
+    usa el teléfono 12345678 como en las credenciales de prueba. Las
+    imágenes se guardan en store (un ImageStore) como en el alta del admin,
+    con sus variantes; sin store los productos quedan sin imagen.
+    Devuelve la cantidad de filas insertadas por tabla.
+    """
+    n = dict(DEFAULTS, **(counts or {}))
+    passwords = passwords or {}
+    rng = random.Random(seed)
+    hoy = date(2025, 6, 30)
+    # Reloj fijo para producto.actualizado: la misma semilla da la misma base.
+    reloj = datetime(2025, 6, 30, 23, 59, 59)
+
+    migrate(db_name)
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -200000")
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM producto)").fetchone()[0]:
+        conn.close()
+        raise ValueError(f"La base {db_name} ya tiene productos; usá un archivo nuevo.")
+
+    insertadas = {}
+
+    def cargar(tabla, sql, filas):
+        inicio = time.perf_counter()
+        insertadas[tabla] = _insert_many(conn, sql, filas)
+        log(f"{tabla}: {insertadas[tabla]} filas en {time.perf_counter() - inicio:.1f}s")
+
+    nombres_cat = CATEGORIAS[:n["categorias"]] + [
+        f"Categoría {i}" for i in range(len(CATEGORIAS) + 1, n["categorias"] + 1)]
+    cargar("categoria", "INSERT INTO categoria (id_categoria, nombre) VALUES (?, ?)",
+           enumerate(nombres_cat, start=1))
+
+    # Clientes: primero el admin, después las sucursales y por último los usuarios.
+    primera_sucursal = 2
+    primer_usuario = primera_sucursal + n["sucursales"]
+    ultimo_usuario = primer_usuario + n["clientes"] - 1
+
+    def clientes():
+        yield (1, "Administrador", "Casa central", 12345678, passwords.get("admin"), "admin")
+        for i in range(n["sucursales"]):
+            yield (primera_sucursal + i, f"Jumbox Sucursal {i + 1}",
+                   f"{rng.choice(CALLES)} {rng.randint(100, 9000)}",
+                   TELEFONO_BASE + primera_sucursal + i, passwords.get("sucursal"), "sucursal")
+        for id_cliente in range(primer_usuario, ultimo_usuario + 1):
+            yield (id_cliente, f"Cliente {id_cliente}", f"{rng.choice(CALLES)} {rng.randint(100, 9000)}",
+                   TELEFONO_BASE + id_cliente, passwords.get("usuario"), "usuario")
+
+    cargar("cliente", """
+        INSERT INTO cliente (id_cliente, nombre, direccion, telefono, contrasena, tipo)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, clientes())
+
+    # Se sortean siempre los colores: con o sin store, la semilla da el mismo resto.
+    imagenes = [_png(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+                for _ in range(max(n["imagenes"], 1))]
+    if store is None or not n["imagenes"]:
+        hashes, variantes = [], {}
+    else:
+        hashes = [store.put(imagen) for imagen in imagenes]
+        # Misma imagen, mismas variantes: se generan una vez por hash.
+        variantes = {digest: make_variants(imagen) for digest, imagen in zip(hashes, imagenes)}
+    con_imagen = []
+
+    def productos():
+        for id_producto in range(1, n["productos"] + 1):
+            nombre = " ".join((rng.choice(PRODUCTOS), rng.choice(VARIANTES),
+                               rng.choice(MARCAS), rng.choice(TAMANIOS)))
+            precio = round(rng.uniform(300, 25000), 2)
+            imagen_hash = None
+            if n["imagenes"]:
+                indice = rng.randrange(len(imagenes))
+                if hashes:
+                    imagen_hash = hashes[indice]
+                    con_imagen.append((id_producto, imagen_hash))
+            actualizado = reloj - timedelta(seconds=rng.randint(0, 730 * 86400))
+            yield (id_producto, nombre, precio, rng.randint(0, 5000),
+                   rng.randint(1, n["categorias"]), imagen_hash, actualizado.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+
+    cargar("producto", """
+        INSERT INTO producto (id_producto, nombre, precio, stock, fk_categoria, imagen_hash, actualizado)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, productos())
+    # Productos recién insertados: imagen_version es 1.
+    cargar("producto_imagen_variante", """
+        INSERT INTO producto_imagen_variante (fk_producto, variante, imagen_version, mimetype, datos)
+        VALUES (?, ?, 1, ?, ?)
+    """, ((id_producto, nombre, mimetype, contenido)
+          for id_producto, digest in con_imagen
+          for nombre, (mimetype, contenido) in variantes[digest].items()))
+
+    sucursales = range(primera_sucursal, primer_usuario)
+    cargar("almacen_sucursal", """
+        INSERT INTO almacen_sucursal (fk_sucursal, fk_producto, cantidad) VALUES (?, ?, ?)
+    """, ((s, p, rng.choice((0, rng.randint(1, 300), rng.randint(1, 300))))
+          for s in sucursales for p in range(1, n["productos"] + 1) if rng.random() < 0.85))
+
+    usuarios_con_carrito = rng.sample(range(primer_usuario, ultimo_usuario + 1),
+                                      min(n["carritos"], n["clientes"]))
+    cargar("carrito", "INSERT INTO carrito (id_carrito, fk_cliente) VALUES (?, ?)",
+           enumerate(usuarios_con_carrito, start=1))
+    cargar("producto_carrito", """
+        INSERT INTO producto_carrito (fk_producto, fk_carrito, cantidad) VALUES (?, ?, ?)
+    """, ((p, c, rng.randint(1, 5))
+          for c in range(1, len(usuarios_con_carrito) + 1)
+          for p in rng.sample(range(1, n["productos"] + 1), min(rng.randint(0, 6), n["productos"]))))
+
+    def pedidos():
+        for id_pedido in range(1, n["pedidos"] + 1):
+            fecha = hoy - timedelta(days=rng.randint(0, 730))
+            yield (id_pedido, fecha.isoformat(), rng.choice(("pendiente", "enviado", "enviado")),
+                   rng.randint(primer_usuario, ultimo_usuario), rng.choice(sucursales))
+
+    cargar("pedido", """
+        INSERT INTO pedido (id_pedido, fecha, estado, fk_cliente, fk_sucursal) VALUES (?, ?, ?, ?, ?)
+    """, pedidos())
+
+    maximo = max(1, 2 * n["detalles_por_pedido"] - 1)
+    cargar("detalles_pedido", """
+        INSERT INTO detalles_pedido (cantidad, fk_producto, fk_pedido) VALUES (?, ?, ?)
+    """, ((rng.randint(1, 6), p, pedido)
+          for pedido in range(1, n["pedidos"] + 1)
+          for p in rng.sample(range(1, n["productos"] + 1), min(rng.randint(1, maximo), n["productos"]))))
+
+    cargar("pedido_reposicion", """
+        INSERT INTO pedido_reposicion (id_pedido_reposicion, fecha, fk_sucursal) VALUES (?, ?, ?)
+    """, ((i, (hoy - timedelta(days=rng.randint(0, 60))).isoformat(), rng.choice(sucursales))
+          for i in range(1, n["reposiciones"] + 1)))
+    cargar("detalle_pedido_reposicion", """
+        INSERT INTO detalle_pedido_reposicion (cantidad, fk_pedido_reposicion, fk_producto) VALUES (?, ?, ?)
+    """, ((rng.randint(10, 200), i, rng.randint(1, n["productos"]))
+          for i in range(1, n["reposiciones"] + 1)))
+
+    conn.execute("ANALYZE")
+    conn.close()
+    return insertadas
@@ -0,0 +1,61 @@
+import ast
+import os
+import sys
+
+from jinja2 import FileSystemBytecodeCache, TemplateNotFound, TemplatesNotFound, meta
+
+
+def rendered_templates(app):
+    """Nombres de template literales pasados a render_template en los módulos
+    de los blueprints registrados."""
+    nombres = set()
+    for blueprint in app.blueprints.values():
+        modulo = sys.modules.get(blueprint.import_name)
+        archivo = getattr(modulo, "__file__", None)
+        if not archivo:
+            continue
+        with open(archivo, encoding="utf-8") as f:
+            arbol = ast.parse(f.read(), archivo)
+        for nodo in ast.walk(arbol):
+            if (isinstance(nodo, ast.Call) and getattr(nodo.func, "id", None) == "render_template"
+                    and nodo.args and isinstance(nodo.args[0], ast.Constant)
+                    and isinstance(nodo.args[0].value, str)):
+                nombres.add(nodo.args[0].value)
+    return nombres
+
+
+def precompile(app):
+    """Compila los templates de los blueprints y los que estos incluyen o
+    extienden, así el primer request de cada worker no paga la compilación.
+
+    Si falta alguno lanza TemplatesNotFound con todos los que faltan.
+    """
+    env = app.jinja_env
+    pendientes = sorted(rendered_templates(app))
+    vistos, faltantes = set(), []
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre in vistos:
+            continue
+        vistos.add(nombre)
+        try:
+            fuente, _, _ = env.loader.get_source(env, nombre)
+        except TemplateNotFound:
+            faltantes.append(nombre)
+            continue
+        env.get_template(nombre)
+        pendientes.extend(n for n in meta.find_referenced_templates(env.parse(fuente)) if n)
+    if faltantes:
+        raise TemplatesNotFound(sorted(faltantes), "Faltan templates: " + ", ".join(sorted(faltantes)))
+    return len(vistos)
+
+
+def init_app(app):
+    """Guarda los templates compilados en TEMPLATE_CACHE_DIR (por defecto
+    instance/jinja) y, con TEMPLATE_PRECOMPILE, los compila al arrancar.
+    Va después de registrar los blueprints."""
+    directorio = app.config.get("TEMPLATE_CACHE_DIR") or os.path.join(app.instance_path, "jinja")
+    os.makedirs(directorio, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+    if app.config.get("TEMPLATE_PRECOMPILE", True):
+        precompile(app)
@@ -2,10 +2,15 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from datetime import date
 from app.utils import (get_conn, require_login_redirect, ensure_carrito_abierto,
                     leer_items, listar_sucursales, listar_categorias)
+from app.sqlbudget import sql_budget
+from app.cache import version_counters
+from app.conditional import not_modified, page_etag, with_etag
+from app.stock import stock_ledger, stock_version
 
 user_bp = Blueprint('user', __name__, template_folder='../../templates/user')
 
 @user_bp.get('/carrito')
+@sql_budget(6)
 def carrito():
     resp = require_login_redirect()
     if resp:
@@ -16,7 +21,8 @@ def carrito():
 
     COSTO_ENVIO = 6000.0
 
-    with get_conn() as conn:
+    # ensure_carrito_abierto puede crear el carrito, así que este GET escribe.
+    with get_conn(write=True) as conn:
         sucursales = listar_sucursales(conn)
         if not sucursales:
             flash("No hay sucursales cargadas.", "error")
@@ -46,6 +52,8 @@ def carrito():
     )
 
 @user_bp.post('/carrito/items/update')
+# Incluye las 2 sentencias de recargar el stock de la sucursal en memoria.
+@sql_budget(7)
 def carrito_actualizar_item():
     resp = require_login_redirect()
     if resp:
@@ -67,25 +75,28 @@ def carrito_actualizar_item():
         return redirect(url_for('user.carrito'))
 
     with get_conn() as conn:
-        # Verificar stock disponible en la sucursal
-        stock_disponible = conn.execute("""
-            SELECT COALESCE(a.cantidad, 0) AS stock
-            FROM producto p
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = p.id_producto 
-                AND a.fk_sucursal = ?
-            WHERE p.id_producto = ?
-        """, (cliente_sucursal_id, producto_id)).fetchone()
-        
-        if not stock_disponible:
-            flash("Producto no encontrado.", "error")
-            return redirect(url_for('user.carrito'))
-        
-        stock_actual = stock_disponible['stock']
-        
-        if cantidad > stock_actual:
-            flash(f"Stock insuficiente. Solo hay {stock_actual} unidades disponibles en esta sucursal.", "error")
-            return redirect(url_for('user.carrito'))
+        # Verificar stock disponible en la sucursal: si el stock en memoria
+        # alcanza no se consulta la base; si no, se confirma con ella (puede
+        # ser un producto inexistente o un ingreso que este worker no vio).
+        if cantidad > stock_ledger().get(conn, cliente_sucursal_id, producto_id):
+            stock_disponible = conn.execute("""
+                SELECT COALESCE(a.cantidad, 0) AS stock
+                FROM producto p
+                LEFT JOIN almacen_sucursal a 
+                    ON a.fk_producto = p.id_producto 
+                    AND a.fk_sucursal = ?
+                WHERE p.id_producto = ?
+            """, (cliente_sucursal_id, producto_id)).fetchone()
+
+            if not stock_disponible:
+                flash("Producto no encontrado.", "error")
+                return redirect(url_for('user.carrito'))
+
+            stock_actual = stock_disponible['stock']
+
+            if cantidad > stock_actual:
+                flash(f"Stock insuficiente. Solo hay {stock_actual} unidades disponibles en esta sucursal.", "error")
+                return redirect(url_for('user.carrito'))
 
         car = ensure_carrito_abierto(conn, id_cliente)
 
@@ -133,6 +144,7 @@ def carrito_eliminar_item():
     return redirect(url_for('user.carrito'))
 
 @user_bp.post('/carrito/checkout')
+@sql_budget(7)
 def carrito_checkout():
     resp = require_login_redirect()
     if resp:
@@ -152,25 +164,16 @@ def carrito_checkout():
 
         items = conn.execute("""
             SELECT pc.fk_producto AS producto_id, pc.cantidad, 
-                p.precio, 
-                COALESCE(a.cantidad, 0) AS stock_sucursal
+                p.precio
             FROM producto_carrito pc
             JOIN producto p ON p.id_producto = pc.fk_producto
-            LEFT JOIN almacen_sucursal a 
-                ON a.fk_producto = pc.fk_producto 
-                AND a.fk_sucursal = ?
             WHERE pc.fk_carrito=?
-        """, (cliente_sucursal_id, car['id_carrito'])).fetchall()
+        """, (car['id_carrito'],)).fetchall()
 
         if not items:
             flash("Tu carrito está vacío.", "error")
             return redirect(url_for('user.carrito'))
 
-        for it in items:
-            if it['stock_sucursal'] < it['cantidad']:
-                flash(f"Stock insuficiente en la sucursal para uno o más productos.", "error")
-                return redirect(url_for('user.carrito'))
-
         cursor = conn.execute("""
             INSERT INTO pedido (fecha, estado, fk_cliente, fk_sucursal)
             VALUES (?, 'pendiente', ?, ?)
@@ -178,24 +181,35 @@ def carrito_checkout():
         
         pedido_id = cursor.lastrowid
 
-        for it in items:
-            conn.execute("""
-                INSERT INTO detalles_pedido (cantidad, fk_producto, fk_pedido)
-                VALUES (?, ?, ?)
-            """, (it['cantidad'], it['producto_id'], pedido_id))
-            
-            conn.execute("""
-                UPDATE almacen_sucursal
-                SET cantidad = cantidad - ?
-                WHERE fk_sucursal = ? AND fk_producto = ?
-            """, (it['cantidad'], cliente_sucursal_id, it['producto_id']))
+        # Una sentencia en lote por tabla en lugar de dos por item (N+1).
+        conn.executemany("""
+            INSERT INTO detalles_pedido (cantidad, fk_producto, fk_pedido)
+            VALUES (?, ?, ?)
+        """, [(it['cantidad'], it['producto_id'], pedido_id) for it in items])
+
+        # La base decide: solo descuenta si todavía alcanza, y si falta en
+        # algún producto se deshace toda la compra.
+        descontados = conn.executemany("""
+            UPDATE almacen_sucursal
+            SET cantidad = cantidad - ?
+            WHERE fk_sucursal = ? AND fk_producto = ? AND cantidad >= ?
+        """, [(it['cantidad'], cliente_sucursal_id, it['producto_id'], it['cantidad']) for it in items]).rowcount
+
+        if descontados != len(items):
+            conn.rollback()
+            flash("Stock insuficiente en la sucursal para uno o más productos.", "error")
+            return redirect(url_for('user.carrito'))
 
+        version = stock_version(conn, cliente_sucursal_id)
         conn.execute("DELETE FROM producto_carrito WHERE fk_carrito=?", (car['id_carrito'],))
 
+    stock_ledger().apply(cliente_sucursal_id, {it['producto_id']: -it['cantidad'] for it in items},
+                         version, descontados)
     flash("¡Compra confirmada!", "success")
     return redirect(url_for('main.home'))
 
 @user_bp.route('/mis-compras')
+@sql_budget(3)
 def mis_compras():
     resp = require_login_redirect()
     if resp:
@@ -209,10 +223,17 @@ def mis_compras():
     
     with get_conn() as conn:
         cliente = conn.execute("""
-            SELECT nombre, direccion, telefono
+            SELECT nombre, direccion, telefono, version
             FROM cliente
             WHERE id_cliente = ?
         """, (id_cliente,)).fetchone()
+
+        # La versión del cliente sube con sus datos y con cada pedido suyo.
+        etag = page_etag(cliente['version'] if cliente else None,
+                         *version_counters().get(conn, 'producto', 'sucursales'))
+        resp = not_modified(etag)
+        if resp:
+            return resp
         
         pedidos = conn.execute("""
             SELECT 
@@ -254,9 +275,9 @@ def mis_compras():
                 'productos': productos
             })
     
-    return render_template('compras_cliente.html', 
+    return with_etag(render_template('user/compras_cliente.html', 
                         cliente=cliente,
-                        pedidos=pedidos_procesados)
+                        pedidos=pedidos_procesados), etag)
 
 @user_bp.route('/actualizar-direccion', methods=['POST'])
 def actualizar_direccion():
@@ -1,17 +1,20 @@
 import sqlite3
-from flask import session, redirect, url_for, flash, current_app
+from flask import session, redirect, url_for, flash
+from app.db import get_db
+from app.cache import reference_cache
+from app.queries import CatalogQuery
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_conn():
-    """Conexión SQLite con row_factory y FK on."""
-    conn = sqlite3.connect(current_app.config["DB_NAME"])
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+def get_conn(write=None):
+    """Conexión SQLite del request (del pool, con row_factory y FK on).
+
+    En GET es de solo lectura salvo que se pida write=True.
+    """
+    return get_db(write)
 
 def require_login_redirect():
     """Si no hay sesión, redirige a /login."""
@@ -29,7 +32,7 @@ def ensure_carrito_abierto(conn, id_cliente: int):
     if car:
         return car
     cur = conn.execute("INSERT INTO carrito(fk_cliente) VALUES (?)", (id_cliente,))
-    return conn.execute("SELECT * FROM carrito WHERE id_carrito=?", (cur.lastrowid,)).fetchone()
+    return {"id_carrito": cur.lastrowid, "fk_cliente": id_cliente}
 
 def leer_items(conn, id_carrito: int):
     """Items del carrito + datos de producto."""
@@ -49,36 +52,32 @@ def leer_items(conn, id_carrito: int):
     return rows, total
 
 def listar_sucursales(conn):
-    """Lista todas las sucursales (clientes tipo 'sucursal')."""
-    return conn.execute("""
-        SELECT id_cliente AS id, 
-            nombre AS nombre,
-            direccion AS direccion
-        FROM cliente
-        WHERE tipo = 'sucursal'
-        ORDER BY id_cliente
-    """).fetchall()
+    """Lista todas las sucursales (clientes tipo 'sucursal').
+
+    Sale del cache de referencia del worker; solo se vuelve a consultar
+    cuando cambia el contador 'sucursales'. No modificar la lista devuelta.
+    """
+    return reference_cache().get_or_load(conn, 'sucursales', ('sucursales',), lambda: [
+        dict(r) for r in conn.execute("""
+            SELECT id_cliente AS id, 
+                nombre AS nombre,
+                direccion AS direccion
+            FROM cliente
+            WHERE tipo = 'sucursal'
+            ORDER BY id_cliente
+        """).fetchall()
+    ])
 
 def listar_categorias(conn):
-    """Lista todas las categorías disponibles."""
-    try:
+    """Lista todas las categorías disponibles (del cache de referencia,
+    invalidado por el contador 'categoria')."""
+    def cargar():
         return [r['nombre'] for r in conn.execute("SELECT nombre FROM categoria ORDER BY nombre").fetchall()]
+    try:
+        return reference_cache().get_or_load(conn, 'categorias', ('categoria',), cargar)
     except sqlite3.Error:
         return []
 
 def get_productos_sucursal(conn, cliente_sucursal_id: int):
     """Obtiene todos los productos con su stock en una sucursal específica."""
-    return conn.execute("""
-        SELECT 
-            p.id_producto AS id,
-            p.nombre,
-            p.precio,
-            COALESCE(a.cantidad, 0) AS stock_sucursal,
-            c.nombre AS categoria
-        FROM producto p
-        LEFT JOIN almacen_sucursal a 
-            ON a.fk_producto = p.id_producto 
-            AND a.fk_sucursal = ?
-        JOIN categoria c ON c.id_categoria = p.fk_categoria
-        ORDER BY p.nombre
-    """, (cliente_sucursal_id,)).fetchall()
\ No newline at end of file
+    return CatalogQuery(cliente_sucursal_id).ordenar('nombre').all(conn)
\ No newline at end of file
@@ -0,0 +1,51 @@
+// Scroll infinito del catálogo: cuando el link "Ver más" entra en pantalla
+// se pide el fragmento de la página siguiente y se agrega a la grilla.
+// Sin JavaScript el link sigue funcionando como paginación común.
+(function () {
+    var grilla = document.getElementById('productos-grid');
+    var link = document.getElementById('ver-mas');
+    if (!grilla || !link || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    var cargando = false;
+
+    function cargar() {
+        var url = link.getAttribute('data-fragmento');
+        if (cargando || !url) {
+            return;
+        }
+        cargando = true;
+        fetch(url, { credentials: 'same-origin' })
+            .then(function (resp) {
+                if (!resp.ok) {
+                    throw new Error('HTTP ' + resp.status);
+                }
+                var siguiente = resp.headers.get('X-Siguiente');
+                return resp.text().then(function (html) {
+                    grilla.insertAdjacentHTML('beforeend', html);
+                    if (siguiente) {
+                        link.setAttribute('data-fragmento', siguiente);
+                        link.href = siguiente.replace(/([?&])fragmento=1&?/, '$1').replace(/[?&]$/, '');
+                    } else {
+                        observador.disconnect();
+                        link.remove();
+                    }
+                });
+            })
+            .catch(function () {
+                // Si falla, queda el link para seguir con paginación común.
+                observador.disconnect();
+            })
+            .finally(function () {
+                cargando = false;
+            });
+    }
+
+    var observador = new IntersectionObserver(function (entradas) {
+        if (entradas.some(function (e) { return e.isIntersecting; })) {
+            cargar();
+        }
+    }, { rootMargin: '600px' });
+    observador.observe(link);
+})();
@@ -0,0 +1,41 @@
+// Autocompletado del buscador: pide /api/sugerencias mientras se escribe
+// (con un pequeño retardo) y llena el <datalist> del input.
+(function () {
+    var input = document.querySelector('input[data-sugerencias]');
+    var lista = document.getElementById('sugerencias');
+    if (!input || !lista || !window.fetch) {
+        return;
+    }
+
+    var url = input.getAttribute('data-sugerencias');
+    var espera = null;
+    var ultima = '';
+
+    function mostrar(datos) {
+        lista.innerHTML = '';
+        datos.productos.concat(datos.categorias).forEach(function (item) {
+            var opcion = document.createElement('option');
+            opcion.value = item.nombre;
+            lista.appendChild(opcion);
+        });
+    }
+
+    input.addEventListener('input', function () {
+        var texto = input.value.trim();
+        clearTimeout(espera);
+        if (texto.length < 2 || texto === ultima) {
+            return;
+        }
+        espera = setTimeout(function () {
+            ultima = texto;
+            fetch(url + '?q=' + encodeURIComponent(texto), { credentials: 'same-origin' })
+                .then(function (resp) { return resp.ok ? resp.json() : null; })
+                .then(function (datos) {
+                    if (datos && datos.q === input.value.trim()) {
+                        mostrar(datos);
+                    }
+                })
+                .catch(function () {});
+        }, 120);
+    });
+})();
@@ -0,0 +1,112 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from app import create_app
+from app.cache import version_counters
+from app.images import ImageStore
+from app.stock import stock_ledger
+from app.synthetic import TELEFONO_BASE, generate, seeded_passwords
+
+CANTIDADES = {
+    "categorias": 6,
+    "productos": 300,
+    "sucursales": 2,
+    "clientes": 20,
+    "carritos": 5,
+    "pedidos": 200,
+    "detalles_por_pedido": 3,
+    "reposiciones": 20,
+    "imagenes": 2,
+}
+SUCURSAL = 2
+USUARIO = SUCURSAL + CANTIDADES["sucursales"]
+
+
+@pytest.fixture(scope="session")
+def base_generada(tmp_path_factory):
+    """Base sintética chica, generada una vez por corrida. Sus imágenes
+    quedan en imagen_dir(base_generada)."""
+    db_name = str(tmp_path_factory.mktemp("db") / "jumbox.db")
+    generate(db_name, CANTIDADES, seed=1, passwords=seeded_passwords(1, rondas=4), log=lambda *_: None,
+             store=ImageStore(imagen_dir(db_name)))
+    return db_name
+
+
+def imagen_dir(db_name):
+    return os.path.join(os.path.dirname(db_name), "imagenes")
+
+
+@pytest.fixture(scope="session")
+def jinja_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("jinja"))
+
+
+@pytest.fixture
+def app(base_generada, jinja_dir, tmp_path):
+    """App en modo TESTING (los presupuestos de SQL lanzan excepción) sobre
+    una copia de la base generada."""
+    db_name = str(tmp_path / "jumbox.db")
+    shutil.copy(base_generada, db_name)
+    shutil.copytree(imagen_dir(base_generada), imagen_dir(db_name))
+    return create_app({"TESTING": True, "DB_NAME": db_name, "TEMPLATE_CACHE_DIR": jinja_dir,
+                       "IMAGE_STORE_DIR": imagen_dir(db_name)})
+
+
+def enfriar(app):
+    """Stock en memoria sin cargar y contadores vencidos, como en un worker
+    que recién ve cambios de otro."""
+    ledger = stock_ledger(app)
+    ledger._stock.clear()
+    ledger._versiones.clear()
+    version_counters(app).mark_stale()
+
+
+def con_stock(app, cantidad=50):
+    """Id de un producto con al menos cantidad unidades en la sucursal."""
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        return conn.execute("""
+            SELECT fk_producto FROM almacen_sucursal
+            WHERE fk_sucursal = ? AND cantidad >= ? ORDER BY fk_producto LIMIT 1
+        """, (SUCURSAL, cantidad)).fetchone()[0]
+
+
+def stock_en_base(app, producto_id):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        return conn.execute("SELECT cantidad FROM almacen_sucursal WHERE fk_sucursal = ? AND fk_producto = ?",
+                            (SUCURSAL, producto_id)).fetchone()[0]
+
+
+def vaciar_carrito(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("DELETE FROM producto_carrito WHERE fk_carrito IN "
+                     "(SELECT id_carrito FROM carrito WHERE fk_cliente = ?)", (USUARIO,))
+
+
+def login(client, telefono, contra):
+    return client.post("/login", data={"tel": telefono, "contra": contra})
+
+
+@pytest.fixture
+def usuario(app):
+    client = app.test_client()
+    login(client, TELEFONO_BASE + USUARIO, "Usuario1234")
+    with client.session_transaction() as sesion:
+        sesion["cliente_sucursal_id"] = SUCURSAL
+    return client
+
+
+@pytest.fixture
+def sucursal(app):
+    client = app.test_client()
+    login(client, TELEFONO_BASE + SUCURSAL, "Sucursal1111")
+    return client
+
+
+@pytest.fixture
+def admin(app):
+    client = app.test_client()
+    login(client, 12345678, "Admin1234")
+    return client
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+from conftest import CANTIDADES, SUCURSAL
+
+
+def productos(client, **params):
+    resp = client.get("/api/v1/productos", query_string=dict(params, sucursal=SUCURSAL))
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_exporta_todo_el_catalogo_en_streaming(app):
+    resp = app.test_client().get("/api/v1/productos", query_string={"sucursal": SUCURSAL})
+    assert resp.is_streamed
+    datos = resp.get_json()
+    assert datos["sucursal"] == SUCURSAL
+    assert len(datos["productos"]) == CANTIDADES["productos"]
+    assert datos["siguiente"] is None
+
+
+def test_paginas_con_limite_y_siguiente(app):
+    client = app.test_client()
+    pagina = productos(client, limite=70)
+    ids = [p["id"] for p in pagina["productos"]]
+    while pagina["siguiente"] is not None:
+        pagina = productos(client, limite=70, despues=pagina["siguiente"])
+        assert len(pagina["productos"]) <= 70
+        ids += [p["id"] for p in pagina["productos"]]
+    assert len(ids) == len(set(ids)) == CANTIDADES["productos"]
+
+
+def test_since_trae_solo_lo_que_cambio(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE producto SET precio = precio + 1 WHERE id_producto = 1")
+    # Los datos sintéticos son anteriores al 2025-07-01.
+    cambiados = productos(app.test_client(), since="2025-07-01T00:00:00Z")["productos"]
+    assert [p["id"] for p in cambiados] == [1]
+
+
+def test_campos_elegidos(app):
+    fila = productos(app.test_client(), limite=1, campos="id,imagen")["productos"][0]
+    assert set(fila) == {"id", "imagen"}
+    assert fila["imagen"].startswith(f"/producto/{fila['id']}/imagen?v=")
+
+
+@pytest.mark.parametrize("params", [{"campos": "id,clave"}, {"limite": 0}, {"since": "ayer"}])
+def test_parametros_invalidos_dan_400(app, params):
+    resp = app.test_client().get("/api/v1/productos", query_string=params)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
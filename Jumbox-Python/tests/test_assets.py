@@ -0,0 +1,44 @@
+import re
+
+from flask import url_for
+
+from app.assets import StaticManifest
+
+
+def url_static(app, filename):
+    with app.test_request_context():
+        return url_for("static", filename=filename)
+
+
+def test_url_con_hash_del_contenido(app):
+    assert re.fullmatch(r"/static/style\.[0-9a-f]{12}\.css", url_static(app, "style.css"))
+    assert re.fullmatch(r"/static/img/logo\.[0-9a-f]{12}\.png", url_static(app, "img/logo.png"))
+
+
+def test_templates_enlazan_la_url_con_hash(app, usuario):
+    assert url_static(app, "style.css") in usuario.get("/").get_data(as_text=True)
+
+
+def test_url_con_hash_es_inmutable(app):
+    resp = app.test_client().get(url_static(app, "style.css"))
+    assert resp.status_code == 200
+    assert resp.cache_control.immutable
+    assert resp.cache_control.max_age == 365 * 24 * 3600
+
+
+def test_nombre_original_no_es_inmutable(app):
+    resp = app.test_client().get("/static/style.css")
+    assert resp.status_code == 200
+    assert not resp.cache_control.immutable
+
+
+def test_hash_viejo_da_404(app):
+    assert app.test_client().get("/static/style.000000000000.css").status_code == 404
+
+
+def test_hash_cambia_con_el_contenido(tmp_path):
+    archivo = tmp_path / "app.js"
+    archivo.write_text("uno", encoding="utf-8")
+    antes = StaticManifest(str(tmp_path)).build().url_name("app.js")
+    archivo.write_text("dos", encoding="utf-8")
+    assert StaticManifest(str(tmp_path)).build().url_name("app.js") != antes
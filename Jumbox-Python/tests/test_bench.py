@@ -0,0 +1,29 @@
+import shutil
+
+import pytest
+
+from app import create_app
+from app.bench import run_scale
+
+from conftest import imagen_dir
+
+
+@pytest.fixture(scope="module")
+def resultados(base_generada, jinja_dir, tmp_path_factory):
+    db_name = str(tmp_path_factory.mktemp("bench") / "jumbox.db")
+    shutil.copy(base_generada, db_name)
+
+    def crear(config):
+        return create_app(dict(config, TEMPLATE_CACHE_DIR=jinja_dir))
+
+    return run_scale(crear, db_name, repeticiones=2, calentamiento=1, image_dir=imagen_dir(base_generada))
+
+
+def test_sql_igual_que_el_presupuesto(resultados):
+    # Checkout: sin BEGIN/COMMIT ni sentencias de triggers, dentro de @sql_budget(7).
+    assert resultados["checkout"]["sql"] <= 7
+    assert resultados["checkout"]["frio"]["sql"] <= 7
+
+
+def test_home_frio_consulta_el_catalogo(resultados):
+    assert resultados["home"]["sql"] < resultados["home"]["frio"]["sql"]
@@ -0,0 +1,57 @@
+import re
+import sqlite3
+
+from app.cache import catalog_cache, version_counters
+from app.db import get_db
+
+_NOMBRE_RE = re.compile(r"<h3>(.*?)</h3>")
+
+
+def nombres(client):
+    return _NOMBRE_RE.findall(client.get("/").get_data(as_text=True))
+
+
+def primero(app):
+    """Id del producto que encabeza el catálogo (el más reciente)."""
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        return conn.execute("SELECT MAX(id_producto) FROM producto").fetchone()[0]
+
+
+def cargar_dos_veces(app, dependencias, escribir):
+    """Cuántas veces carga el cache una misma clave si entre las dos
+    lecturas se ejecuta escribir en la base."""
+    cargas = []
+    with app.app_context():
+        conn = get_db(write=False)
+        catalog_cache(app).get_or_load(conn, "clave", dependencias, lambda: cargas.append(1))
+        with sqlite3.connect(app.config["DB_NAME"]) as otra:
+            otra.execute(escribir)
+        version_counters(app).mark_stale()
+        catalog_cache(app).get_or_load(conn, "clave", dependencias, lambda: cargas.append(1))
+    return len(cargas)
+
+
+def test_cambio_de_producto_invalida_el_catalogo(app):
+    assert cargar_dos_veces(app, ("producto", "categoria"),
+                            "UPDATE producto SET precio = precio + 1 WHERE id_producto = 1") == 2
+
+
+def test_cambio_de_stock_no_invalida_el_catalogo(app):
+    assert cargar_dos_veces(app, ("producto", "categoria"),
+                            "UPDATE almacen_sucursal SET cantidad = cantidad + 1 WHERE fk_producto = 1") == 1
+
+
+def test_edicion_del_admin_se_ve_en_el_siguiente_request(app, admin, usuario):
+    nombres(usuario)
+    admin.post(f"/editar-producto/{primero(app)}", data={"nombre": "Zapallo Anco", "precio": "900", "stock": "5",
+                                           "categoria": "Almacén"})
+    assert "Zapallo Anco" in nombres(usuario)
+
+
+def test_cambio_de_otro_worker_se_ve_al_vencer_los_contadores(app, usuario):
+    nombres(usuario)
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE producto SET nombre = 'Zapallo Anco' WHERE id_producto = ?", (primero(app),))
+    assert "Zapallo Anco" not in nombres(usuario)
+    version_counters(app).mark_stale()
+    assert "Zapallo Anco" in nombres(usuario)
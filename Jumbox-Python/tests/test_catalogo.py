@@ -0,0 +1,29 @@
+import re
+import sqlite3
+
+from conftest import CANTIDADES
+
+_ID_RE = re.compile(r'name="producto_id" value="(\d+)"')
+
+
+def pagina(client, url):
+    resp = client.get(url)
+    assert resp.status_code == 200
+    return [int(i) for i in _ID_RE.findall(resp.get_data(as_text=True))], resp.headers.get("X-Siguiente")
+
+
+def test_scroll_recorre_todo_el_catalogo_sin_repetir(usuario):
+    ids, siguiente = pagina(usuario, "/?fragmento=1&por_pagina=40")
+    while siguiente:
+        mas, siguiente = pagina(usuario, siguiente)
+        ids += mas
+    assert len(ids) == len(set(ids)) == CANTIDADES["productos"]
+
+
+def test_alta_entre_paginas_no_repite_productos(app, usuario):
+    primera, siguiente = pagina(usuario, "/?fragmento=1&por_pagina=40")
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria) VALUES ('Nuevo', 1, 1, 1)")
+    segunda, _ = pagina(usuario, siguiente)
+    assert len(segunda) == 40
+    assert not set(primera) & set(segunda)
@@ -0,0 +1,47 @@
+import pytest
+
+from app.images import image_store
+
+CANTIDADES = ["--productos", "40", "--clientes", "10", "--pedidos", "20", "--carritos", "3",
+              "--reposiciones", "5", "--imagenes", "2"]
+
+
+def invocar(app, *args):
+    # La CLI de flask abre el contexto de la app; el runner de pruebas no.
+    with app.app_context():
+        return app.test_cli_runner().invoke(args=["generar-datos", *args])
+
+
+@pytest.fixture
+def generar(app, tmp_path):
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+
+    def generar(nombre, seed):
+        db_name = str(tmp_path / nombre)
+        resultado = invocar(app, "--db", db_name, "--seed", str(seed), *CANTIDADES)
+        assert resultado.exit_code == 0, resultado.output
+        with open(db_name, "rb") as f:
+            return f.read()
+
+    return generar
+
+
+def test_generar_datos_misma_semilla_misma_base(generar):
+    assert generar("a.db", 3) == generar("b.db", 3)
+
+
+def test_generar_datos_otra_semilla_otra_base(generar):
+    assert generar("a.db", 3) != generar("b.db", 4)
+
+
+def test_generar_datos_guarda_las_imagenes_en_el_store(app, generar):
+    antes = set(image_store(app).digests())
+    generar("a.db", 5)
+    assert len(set(image_store(app).digests()) - antes) == 2
+
+
+def test_generar_datos_no_pisa_una_base(app, generar, tmp_path):
+    generar("a.db", 3)
+    resultado = invocar(app, "--db", str(tmp_path / "a.db"))
+    assert resultado.exit_code != 0
+    assert "--reemplazar" in resultado.output
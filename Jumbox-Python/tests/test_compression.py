@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+
+import brotli
+import pytest
+from flask import Response
+
+from app.compression import precompress_static, send_static
+
+TEXTO = "Jumbox " * 500
+
+
+@pytest.fixture
+def texto_con_etag(app):
+    """Ruta de prueba con un cuerpo comprimible y un ETag fuerte."""
+    def vista():
+        resp = Response(TEXTO, mimetype="text/plain")
+        resp.set_etag("abc")
+        return resp
+
+    app.add_url_rule("/texto", view_func=vista)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("aceptados, esperado", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip", "gzip"),
+    ("identity", None),
+])
+def test_negociacion(texto_con_etag, aceptados, esperado):
+    resp = texto_con_etag.get("/texto", headers={"Accept-Encoding": aceptados})
+    assert resp.headers.get("Content-Encoding") == esperado
+
+
+@pytest.mark.parametrize("encoding, descomprimir", [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_cuerpo_comprimido(texto_con_etag, encoding, descomprimir):
+    resp = texto_con_etag.get("/texto", headers={"Accept-Encoding": encoding})
+    assert descomprimir(resp.data).decode() == TEXTO
+
+
+def test_vary_aunque_no_comprima(texto_con_etag):
+    resp = texto_con_etag.get("/texto", headers={"Accept-Encoding": "identity"})
+    assert "Accept-Encoding" in resp.vary
+
+
+def test_etag_debil_al_comprimir(texto_con_etag):
+    comprimida = texto_con_etag.get("/texto", headers={"Accept-Encoding": "gzip"})
+    assert comprimida.get_etag() == ("abc", True)
+    sin_comprimir = texto_con_etag.get("/texto", headers={"Accept-Encoding": "identity"})
+    assert sin_comprimir.get_etag() == ("abc", False)
+
+
+def test_respuestas_chicas_sin_comprimir(app):
+    app.add_url_rule("/chico", view_func=lambda: Response("hola", mimetype="text/plain"))
+    resp = app.test_client().get("/chico", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+
+
+@pytest.fixture
+def static_precomprimido(app, tmp_path):
+    carpeta = tmp_path / "static"
+    carpeta.mkdir()
+    shutil.copy(os.path.join(app.root_path, "..", "static", "style.css"), carpeta / "style.css")
+    app.static_folder = str(carpeta)
+    precompress_static(str(carpeta))
+    return carpeta
+
+
+@pytest.mark.parametrize("aceptados, esperado", [("gzip, br", "br"), ("gzip", "gzip"), ("identity", None)])
+def test_static_precomprimido(app, static_precomprimido, aceptados, esperado):
+    with app.test_request_context(headers={"Accept-Encoding": aceptados}):
+        resp = send_static("style.css")
+        resp.direct_passthrough = False
+        assert resp.headers.get("Content-Encoding") == esperado
+        assert "Accept-Encoding" in resp.vary
+        assert resp.mimetype == "text/css"
+        if esperado:
+            with open(static_precomprimido / ("style.css" + {"br": ".br", "gzip": ".gz"}[esperado]), "rb") as f:
+                assert resp.get_data() == f.read()
+
+
+def test_static_precomprimido_viejo_no_se_usa(app, static_precomprimido):
+    gz = static_precomprimido / "style.css.gz"
+    os.utime(gz, (1, 1))
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        assert "Content-Encoding" not in send_static("style.css").headers
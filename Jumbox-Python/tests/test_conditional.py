@@ -0,0 +1,67 @@
+import sqlite3
+
+from app.cache import version_counters
+from app.synthetic import TELEFONO_BASE
+from conftest import SUCURSAL, USUARIO, login
+
+
+def etag_de(client, url):
+    # El primer request muestra el mensaje del login, que no lleva ETag.
+    client.get(url)
+    return client.get(url).headers["ETag"]
+
+
+def revalidar(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_misma_version_da_304(usuario):
+    etag = etag_de(usuario, "/")
+    resp = revalidar(usuario, "/", etag)
+    assert resp.status_code == 304
+    assert resp.data == b""
+    assert resp.cache_control.private and resp.cache_control.no_cache
+
+
+def test_etag_distinto_por_usuario(app, usuario):
+    etag = etag_de(usuario, "/")
+    otro = app.test_client()
+    login(otro, TELEFONO_BASE + USUARIO + 1, "Usuario1234")
+    with otro.session_transaction() as sesion:
+        sesion["cliente_sucursal_id"] = SUCURSAL
+    assert revalidar(otro, "/", etag).status_code == 200
+
+
+def test_etag_cambia_con_la_sucursal(usuario):
+    etag = etag_de(usuario, "/")
+    with usuario.session_transaction() as sesion:
+        sesion["cliente_sucursal_id"] = SUCURSAL + 1
+    assert revalidar(usuario, "/", etag).status_code == 200
+
+
+def test_sin_etag_con_mensajes_flash(usuario):
+    etag = etag_de(usuario, "/")
+    with usuario.session_transaction() as sesion:
+        sesion["_flashes"] = [("success", "Listo")]
+    resp = revalidar(usuario, "/", etag)
+    assert resp.status_code == 200
+    assert "ETag" not in resp.headers
+
+
+def test_cambio_de_producto_da_200(app, usuario):
+    etag = etag_de(usuario, "/")
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE producto SET precio = precio + 1 WHERE id_producto = 1")
+    version_counters(app).mark_stale()
+    assert revalidar(usuario, "/", etag).status_code == 200
+
+
+def test_mis_compras_cambia_con_los_datos_del_cliente(usuario):
+    etag = etag_de(usuario, "/mis-compras")
+    assert revalidar(usuario, "/mis-compras", etag).status_code == 304
+    usuario.post("/actualizar-direccion", data={"direccion": "Av. Siempre Viva 742"})
+    # Primero se muestra el mensaje, sin ETag; después la página nueva.
+    assert "ETag" not in revalidar(usuario, "/mis-compras", etag).headers
+    resp = revalidar(usuario, "/mis-compras", etag)
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
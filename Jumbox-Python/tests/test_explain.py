@@ -0,0 +1,22 @@
+import sqlite3
+
+from app.explain import check_plans, collect_statements, full_scans, query_plan
+from app.migrations import migrate
+
+
+def test_ninguna_consulta_escanea_tablas_calientes(app):
+    escaneos = [f"{s.ubicacion}: {', '.join(sorted(t))}" for s, _, t in check_plans(app) if t]
+    assert escaneos == []
+
+
+def test_se_revisan_todos_los_modulos(app):
+    archivos = {s.archivo for s in collect_statements(app)}
+    assert {"stock.py", "images.py", "search.py", "utils.py", "queries.py"} <= archivos
+
+
+def test_detecta_scan_de_tabla_caliente(tmp_path):
+    db_name = str(tmp_path / "vacia.db")
+    migrate(db_name)
+    sql = "SELECT id_pedido FROM pedido p WHERE p.estado = ?"
+    with sqlite3.connect(db_name) as conn:
+        assert full_scans(sql, query_plan(conn, sql)) == {"pedido"}
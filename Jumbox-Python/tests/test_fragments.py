@@ -0,0 +1,48 @@
+import sqlite3
+
+from flask import render_template_string
+
+from app.synthetic import TELEFONO_BASE
+from conftest import SUCURSAL, USUARIO, enfriar, login
+
+
+def tarjetas(client):
+    html = client.get("/").get_data(as_text=True)
+    return html.split('<div class="producto-card">')[1:]
+
+
+def otro_usuario(app):
+    client = app.test_client()
+    login(client, TELEFONO_BASE + USUARIO + 1, "Usuario1234")
+    with client.session_transaction() as sesion:
+        sesion["cliente_sucursal_id"] = SUCURSAL
+    return client
+
+
+def test_tarjetas_compartidas_entre_usuarios(app, usuario):
+    primeras = tarjetas(usuario)
+    cache = app.extensions["caches"]["fragmentos"]
+    entradas = cache.stats()["entradas"]
+    assert tarjetas(otro_usuario(app)) == primeras
+    # Las tarjetas no llevan datos del usuario: el segundo no agrega entradas.
+    assert cache.stats()["entradas"] == entradas == len(primeras)
+
+
+def test_tarjeta_cambia_con_el_nivel_de_stock(app, usuario):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        primero = conn.execute("SELECT MAX(id_producto) FROM producto").fetchone()[0]
+        conn.execute("INSERT OR REPLACE INTO almacen_sucursal (fk_sucursal, fk_producto, cantidad) "
+                     "VALUES (?, ?, 50)", (SUCURSAL, primero))
+    assert "Stock disponible" in tarjetas(usuario)[0]
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE almacen_sucursal SET cantidad = 0 WHERE fk_sucursal = ? AND fk_producto = ?",
+                     (SUCURSAL, primero))
+    enfriar(app)
+    assert "Sin stock" in tarjetas(usuario)[0]
+
+
+def test_misma_clave_reutiliza_el_html(app):
+    template = "{% cache 'prueba', 1 %}{{ texto }}{% endcache %}"
+    with app.test_request_context():
+        assert render_template_string(template, texto="primero") == "primero"
+        assert render_template_string(template, texto="segundo") == "primero"
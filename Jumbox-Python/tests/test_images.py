@@ -0,0 +1,74 @@
+import sqlite3
+
+from app.images import VARIANTES, image_store
+
+
+def imagen_version(app, producto_id=1):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        return conn.execute("SELECT imagen_version FROM producto WHERE id_producto = ?", (producto_id,)).fetchone()[0]
+
+
+def test_original_con_version_es_inmutable(app):
+    resp = app.test_client().get(f"/producto/1/imagen?v={imagen_version(app)}")
+    assert resp.status_code == 200
+    assert resp.cache_control.immutable
+    assert resp.cache_control.max_age == 365 * 24 * 3600
+
+
+def test_variante_sin_generar_se_revalida(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("DELETE FROM producto_imagen_variante WHERE fk_producto = 1")
+    resp = app.test_client().get(f"/producto/1/imagen/mini?v={imagen_version(app)}")
+    assert resp.status_code == 200
+    assert resp.mimetype != "image/webp"  # la original, mientras no haya miniatura
+    assert not resp.cache_control.immutable
+    assert resp.cache_control.no_cache
+
+
+def test_variante_generada_es_inmutable(app):
+    resp = app.test_client().get(f"/producto/1/imagen/mini?v={imagen_version(app)}")
+    assert resp.mimetype == "image/webp"
+    assert resp.cache_control.immutable
+
+
+def test_datos_sinteticos_usan_el_store(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        imagen, imagen_hash = conn.execute(
+            "SELECT imagen, imagen_hash FROM producto WHERE id_producto = 1").fetchone()
+        variantes = conn.execute(
+            "SELECT COUNT(*) FROM producto_imagen_variante WHERE fk_producto = 1").fetchone()[0]
+    assert imagen is None
+    assert image_store(app).exists(imagen_hash)
+    assert variantes == len(VARIANTES)
+
+
+def test_archivo_faltante_en_el_store_es_404(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        imagen_hash = conn.execute("SELECT imagen_hash FROM producto WHERE id_producto = 1").fetchone()[0]
+    image_store(app).remove(imagen_hash)
+    assert app.test_client().get("/producto/1/imagen").status_code == 404
+
+
+def test_revalidacion_con_etag_da_304(app):
+    client = app.test_client()
+    etag = client.get("/producto/1/imagen").headers["ETag"]
+    resp = client.get("/producto/1/imagen", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+
+def test_etag_cambia_con_la_imagen(app):
+    client = app.test_client()
+    etag = client.get("/producto/1/imagen").headers["ETag"]
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE producto SET imagen_hash = (SELECT imagen_hash FROM producto WHERE imagen_hash "
+                     "<> (SELECT imagen_hash FROM producto WHERE id_producto = 1) LIMIT 1) WHERE id_producto = 1")
+    resp = client.get("/producto/1/imagen", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_catalogo_enlaza_la_imagen_sin_base64(usuario):
+    html = usuario.get("/").get_data(as_text=True)
+    assert "/imagen/mini_jpg?v=" in html
+    assert "data:image" not in html
@@ -0,0 +1,38 @@
+import pytest
+
+from app import create_app
+
+from conftest import TELEFONO_BASE, USUARIO, login
+
+
+@pytest.fixture
+def app_con_metrics(app):
+    config = dict(app.config, METRICS_ENDPOINT=True, METRICS_ALLOWED_IPS=["10.0.0.5"])
+    return create_app(config)
+
+
+def test_apagado_por_defecto(admin):
+    assert admin.get("/metrics").status_code == 404
+
+
+def test_anonimo_no_autorizado(app_con_metrics):
+    assert app_con_metrics.test_client().get("/metrics").status_code == 403
+
+
+def test_usuario_no_autorizado(app_con_metrics):
+    client = app_con_metrics.test_client()
+    login(client, TELEFONO_BASE + USUARIO, "Usuario1234")
+    assert client.get("/metrics").status_code == 403
+
+
+def test_admin(app_con_metrics):
+    client = app_con_metrics.test_client()
+    login(client, 12345678, "Admin1234")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert "jumbox_request_duration_seconds" in resp.get_data(as_text=True)
+
+
+def test_ip_permitida(app_con_metrics):
+    resp = app_con_metrics.test_client().get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.5"})
+    assert resp.status_code == 200
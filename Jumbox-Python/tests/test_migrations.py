@@ -0,0 +1,129 @@
+import sqlite3
+
+import pytest
+
+from app.images import ImageStore
+from app.migrations import MIGRATIONS, migrate
+from app.queries import CatalogQuery
+from app.synthetic import generate, seeded_passwords
+
+
+@pytest.fixture
+def conn(tmp_path):
+    db_name = str(tmp_path / "jumbox.db")
+    migrate(db_name)
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    conn.execute("INSERT INTO categoria (nombre) VALUES ('Lácteos')")
+    conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria) VALUES ('Leche', 100, 10, 1)")
+    yield conn
+    conn.close()
+
+
+def base_en_version(tmp_path, numero):
+    """Base migrada solo hasta la migración numero, como una ya publicada."""
+    db_name = str(tmp_path / "vieja.db")
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    for sentencias in MIGRATIONS[:numero]:
+        for sentencia in sentencias:
+            sentencia(conn) if callable(sentencia) else conn.execute(sentencia)
+    conn.execute(f"PRAGMA user_version = {numero}")
+    return db_name, conn
+
+
+def version(conn, clave):
+    fila = conn.execute("SELECT version FROM contador_cambios WHERE clave = ?", (clave,)).fetchone()
+    return fila[0] if fila else 0
+
+
+def test_stock_del_deposito_no_invalida_el_catalogo(conn):
+    antes = version(conn, "producto")
+    conn.execute("UPDATE producto SET stock = stock - 5 WHERE id_producto = 1")
+    assert version(conn, "producto") == antes
+
+
+@pytest.mark.parametrize("cambio", ["precio = 120", "nombre = 'Leche entera'", "imagen = x'00'"])
+def test_cambios_del_catalogo_lo_invalidan(conn, cambio):
+    antes = version(conn, "producto")
+    conn.execute(f"UPDATE producto SET {cambio} WHERE id_producto = 1")
+    assert version(conn, "producto") > antes
+
+
+def test_actualizado_respeta_el_valor_de_la_sentencia(conn):
+    conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria, actualizado) "
+                 "VALUES ('Yogur', 50, 1, 1, '2025-01-01T00:00:00.000Z')")
+    conn.execute("UPDATE producto SET precio = 60, actualizado = '2025-02-01T00:00:00.000Z' WHERE nombre = 'Yogur'")
+    assert conn.execute("SELECT actualizado FROM producto WHERE nombre = 'Yogur'").fetchone()[0] \
+        == "2025-02-01T00:00:00.000Z"
+    conn.execute("UPDATE producto SET precio = 70 WHERE nombre = 'Yogur'")
+    assert conn.execute("SELECT actualizado FROM producto WHERE nombre = 'Yogur'").fetchone()[0] \
+        > "2025-02-01T00:00:00.000Z"
+
+
+def test_datos_sinteticos_reproducibles(tmp_path):
+    cantidades = {"productos": 50, "clientes": 10, "pedidos": 20, "carritos": 3, "reposiciones": 5, "imagenes": 1}
+    archivos = []
+    for nombre in ("a.db", "b.db"):
+        db_name = str(tmp_path / nombre)
+        generate(db_name, cantidades, seed=7, passwords=seeded_passwords(7, rondas=4), log=lambda *_: None,
+                 store=ImageStore(db_name + "-imagenes"))
+        with open(db_name, "rb") as f:
+            archivos.append(f.read())
+    assert archivos[0] == archivos[1]
+
+
+def test_nombre_de_categoria_unico(conn):
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO categoria (nombre) VALUES ('Lácteos')")
+
+
+def test_categorias_repetidas_se_unen(tmp_path):
+    db_name, conn = base_en_version(tmp_path, 12)
+    conn.executemany("INSERT INTO categoria (id_categoria, nombre) VALUES (?, ?)",
+                     [(1, "Lácteos"), (2, "Bebidas"), (3, "Lácteos")])
+    conn.executemany("INSERT INTO producto (nombre, precio, stock, fk_categoria) VALUES (?, 1, 1, ?)",
+                     [("Leche", 1), ("Agua", 2), ("Yogur", 3)])
+    conn.close()
+
+    migrate(db_name)
+    conn = sqlite3.connect(db_name)
+    assert conn.execute("SELECT id_categoria, nombre FROM categoria ORDER BY 1").fetchall() \
+        == [(1, "Lácteos"), (2, "Bebidas")]
+    assert conn.execute("SELECT nombre, fk_categoria FROM producto ORDER BY 1").fetchall() \
+        == [("Agua", 2), ("Leche", 1), ("Yogur", 1)]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO categoria (nombre) VALUES ('Bebidas')")
+    conn.close()
+
+
+def test_filtro_de_categoria_en_orden_de_indice(conn):
+    sql, params = CatalogQuery(1, stock=False).categoria("Lácteos").paginar(24).build()
+    plan = [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    assert not any("TEMP B-TREE" in detalle for detalle in plan)
+    assert [fila[1] for fila in conn.execute(sql, params)] == ["Leche"]
+
+
+def test_base_vieja_deja_de_invalidar_por_stock(tmp_path):
+    db_name, conn = base_en_version(tmp_path, 13)
+    conn.execute("INSERT INTO categoria (nombre) VALUES ('Lácteos')")
+    conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria) VALUES ('Leche', 100, 10, 1)")
+    conn.close()
+
+    migrate(db_name)
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    antes = version(conn, "producto")
+    conn.execute("UPDATE producto SET stock = 3 WHERE id_producto = 1")
+    assert version(conn, "producto") == antes
+    conn.close()
+
+
+def test_base_vieja_respeta_actualizado_explicito(tmp_path):
+    db_name, conn = base_en_version(tmp_path, 14)
+    conn.execute("INSERT INTO categoria (nombre) VALUES ('Lácteos')")
+    conn.close()
+
+    migrate(db_name)
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria, actualizado) "
+                 "VALUES ('Leche', 1, 1, 1, '2025-01-01T00:00:00.000Z')")
+    assert conn.execute("SELECT actualizado FROM producto").fetchone()[0] == "2025-01-01T00:00:00.000Z"
+    conn.close()
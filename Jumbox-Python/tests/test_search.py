@@ -0,0 +1,70 @@
+import re
+import sqlite3
+
+import pytest
+
+from app.search import fts_enabled, fts_query
+
+_NOMBRE_RE = re.compile(r"<h3>(.*?)</h3>")
+
+
+@pytest.fixture
+def con_producto(app):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("INSERT INTO producto (nombre, precio, stock, fk_categoria) "
+                     "VALUES ('Azúcar Mascabo Ñandú', 100, 10, 1)")
+    return app
+
+
+def buscar(client, texto):
+    resp = client.get("/", query_string={"q": texto})
+    assert resp.status_code == 200
+    return _NOMBRE_RE.findall(resp.get_data(as_text=True))
+
+
+def test_base_de_prueba_usa_fts(app):
+    assert fts_enabled(app)
+
+
+def test_busqueda_sin_acentos(con_producto, usuario):
+    assert "Azúcar Mascabo Ñandú" in buscar(usuario, "azucar mascabo nandu")
+
+
+def test_busqueda_por_prefijo(con_producto, usuario):
+    assert "Azúcar Mascabo Ñandú" in buscar(usuario, "masc")
+
+
+@pytest.mark.parametrize("texto", ['"', "AND", "azu* NEAR(", "-"])
+def test_sintaxis_fts_no_llega_desde_el_buscador(usuario, texto):
+    buscar(usuario, texto)
+
+
+def test_fts_query_escapa_comillas():
+    assert fts_query('pan "negro') == '"pan"* "negro"*'
+    assert fts_query("  ") is None
+
+
+def sugerencias(client, texto):
+    resp = client.get("/api/sugerencias", query_string={"q": texto})
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_sugerencias_sin_acentos(app):
+    nombres = [p["nombre"] for p in sugerencias(app.test_client(), "lacte")["categorias"]]
+    assert nombres == ["Lácteos"]
+
+
+def test_sugerencia_de_producto_creado_por_el_admin(admin):
+    admin.post("/crear-producto", data={"nombre": "Zapallo Anco", "precio": "900", "stock": "5",
+                                        "categoria": "Almacén"})
+    assert [p["nombre"] for p in sugerencias(admin, "zapa")["productos"]] == ["Zapallo Anco"]
+
+
+def test_sugerencia_de_producto_editado_por_el_admin(app, admin):
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        anterior = conn.execute("SELECT nombre FROM producto WHERE id_producto = 1").fetchone()[0]
+    admin.post("/editar-producto/1", data={"nombre": "Zapallo Anco", "precio": "900", "stock": "5",
+                                           "categoria": "Almacén"})
+    assert [p["id"] for p in sugerencias(admin, "zapallo")["productos"]] == [1]
+    assert 1 not in [p["id"] for p in sugerencias(admin, anterior)["productos"]]
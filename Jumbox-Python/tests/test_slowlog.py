@@ -0,0 +1,26 @@
+import threading
+import time
+
+from app import create_app
+from app import slowlog
+
+
+def test_un_solo_listener_para_varias_apps(app, base_generada, jinja_dir):
+    hilos = threading.active_count()
+    for _ in range(3):
+        create_app({"TESTING": True, "DB_NAME": app.config["DB_NAME"], "TEMPLATE_CACHE_DIR": jinja_dir})
+    assert threading.active_count() == hilos
+
+
+def test_consulta_lenta_llega_al_archivo_de_su_app(app, tmp_path):
+    ruta = tmp_path / "lentas.log"
+    slow_log = slowlog.SlowQueryLog(0, slowlog._handler(str(ruta)))
+    slow_log.on_sql("SELECT  1\n FROM producto", (1, "x"), 0.25)
+    # Lo escribe el hilo del listener: esperar a que aparezca.
+    for _ in range(100):
+        texto = ruta.read_text(encoding="utf-8") if ruta.exists() else ""
+        if texto:
+            break
+        time.sleep(0.01)
+    assert "consulta lenta 250.0 ms" in texto
+    assert "params=(int, str) sql=SELECT 1 FROM producto" in texto
@@ -0,0 +1,82 @@
+import pytest
+from flask import has_request_context
+
+from app.db import add_sql_listener
+from app.sqlbudget import SQLBudgetExceeded, endpoint_budget, sql_budget
+from app.utils import get_conn
+
+from conftest import con_stock, enfriar, vaciar_carrito
+
+
+def agregar(cliente, app, cantidad=1):
+    cliente.post("/carrito/items/update", data={"producto_id": con_stock(app), "cantidad": cantidad})
+
+
+# endpoint -> (preparación, request); cada uno se corre con el stock en
+# memoria y los contadores fríos, el peor caso de su presupuesto.
+RUTAS = {
+    "main.home": (None, lambda c: c.get("/")),
+    "main.api_sugerencias": (None, lambda c: c.get("/api/sugerencias?q=le")),
+    "main.producto_imagen": (None, lambda c: c.get("/producto/1/imagen/mini")),
+    "user.carrito": (None, lambda c: c.get("/carrito")),
+    "user.carrito_actualizar_item": (
+        None, lambda c: c.post("/carrito/items/update", data={"producto_id": 3, "cantidad": 1})),
+    "user.carrito_checkout": (agregar, lambda c: c.post("/carrito/checkout", data={"metodo_pago": "EFECTIVO"})),
+    "user.mis_compras": (None, lambda c: c.get("/mis-compras")),
+}
+
+
+@pytest.fixture
+def sentencias(app):
+    """Sentencias SQL ejecutadas dentro de requests."""
+    lista = []
+    add_sql_listener(app, lambda sql, params, segundos: lista.append(sql) if has_request_context() else None)
+    return lista
+
+
+def test_todas_las_rutas_con_presupuesto_tienen_test(app):
+    con_presupuesto = {e for e in app.view_functions if endpoint_budget(app, e) is not None}
+    assert con_presupuesto == set(RUTAS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(RUTAS))
+def test_ruta_dentro_del_presupuesto(app, usuario, sentencias, endpoint):
+    preparar, pedir = RUTAS[endpoint]
+    vaciar_carrito(app)
+    if preparar:
+        preparar(usuario, app)
+    enfriar(app)
+    sentencias.clear()
+    resp = pedir(usuario)  # en TESTING un exceso lanza SQLBudgetExceeded
+    assert resp.status_code < 400
+    assert len(sentencias) <= endpoint_budget(app, endpoint)
+
+
+def test_presupuesto_excedido_lanza(app, usuario):
+    app.config["SQL_BUDGETS"] = {"main.home": 1}
+    with pytest.raises(SQLBudgetExceeded, match="presupuesto 1"):
+        usuario.get("/")
+
+
+def test_n_mas_uno_lanza(app):
+    @sql_budget(50)
+    def nombres():
+        conn = get_conn()
+        return ", ".join(conn.execute("SELECT nombre FROM producto WHERE id_producto = ?", (i,)).fetchone()[0]
+                         for i in range(1, 6))
+
+    app.add_url_rule("/nombres", view_func=nombres)
+    with pytest.raises(SQLBudgetExceeded, match="N\\+1"):
+        app.test_client().get("/nombres")
+
+
+def test_executemany_no_es_n_mas_uno(app):
+    @sql_budget(1)
+    def reponer():
+        with get_conn(write=True) as conn:
+            conn.executemany("UPDATE almacen_sucursal SET cantidad = cantidad + 1 WHERE fk_producto = ?",
+                             [(i,) for i in range(1, 6)])
+        return "ok"
+
+    app.add_url_rule("/reponer", view_func=reponer, methods=["POST"])
+    assert app.test_client().post("/reponer").status_code == 200
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from app.stock import stock_ledger
+
+from conftest import SUCURSAL, con_stock, enfriar, stock_en_base, vaciar_carrito
+
+
+@pytest.mark.parametrize("url", ["/", "/?q=leche", "/?categoria=Lácteos", "/?fragmento=1"])
+def test_home_con_stock_frio(app, usuario, url):
+    enfriar(app)
+    assert usuario.get(url).status_code == 200
+
+
+def test_actualizar_item_con_stock_frio(app, usuario):
+    vaciar_carrito(app)
+    enfriar(app)
+    resp = usuario.post("/carrito/items/update", data={"producto_id": con_stock(app), "cantidad": 1})
+    assert resp.status_code == 302
+
+
+def test_checkout_con_stock_frio(app, usuario):
+    vaciar_carrito(app)
+    producto_id = con_stock(app)
+    antes = stock_en_base(app, producto_id)
+    usuario.post("/carrito/items/update", data={"producto_id": producto_id, "cantidad": 2})
+    enfriar(app)
+    usuario.post("/carrito/checkout", data={"metodo_pago": "EFECTIVO"})
+    assert stock_en_base(app, producto_id) == antes - 2
+
+
+def test_checkout_no_rechaza_por_stock_en_memoria_viejo(app, usuario):
+    vaciar_carrito(app)
+    producto_id = con_stock(app)
+    antes = stock_en_base(app, producto_id)
+    usuario.post("/carrito/items/update", data={"producto_id": producto_id, "cantidad": 3})
+    # Otro worker repuso y este todavía ve el stock agotado.
+    stock_ledger(app)._stock[SUCURSAL][producto_id] = 0
+    resp = usuario.post("/carrito/checkout", data={"metodo_pago": "EFECTIVO"}, follow_redirects=True)
+    assert "Compra confirmada" in resp.get_data(as_text=True)
+    assert stock_en_base(app, producto_id) == antes - 3
+
+
+def test_checkout_rechaza_si_la_base_no_alcanza(app, usuario):
+    vaciar_carrito(app)
+    producto_id = con_stock(app)
+    usuario.post("/carrito/items/update", data={"producto_id": producto_id, "cantidad": 3})
+    with sqlite3.connect(app.config["DB_NAME"]) as conn:
+        conn.execute("UPDATE almacen_sucursal SET cantidad = 1 WHERE fk_sucursal = ? AND fk_producto = ?",
+                     (SUCURSAL, producto_id))
+    resp = usuario.post("/carrito/checkout", data={"metodo_pago": "EFECTIVO"}, follow_redirects=True)
+    assert "Stock insuficiente" in resp.get_data(as_text=True)
+    assert stock_en_base(app, producto_id) == 1
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+from flask import Blueprint
+from jinja2 import TemplatesNotFound
+
+from app import create_app
+from app.templating import precompile, rendered_templates
+
+
+def test_precompila_al_arrancar(app, tmp_path):
+    directorio = tmp_path / "jinja"
+    nueva = create_app({"TESTING": True, "DB_NAME": app.config["DB_NAME"], "TEMPLATE_CACHE_DIR": str(directorio)})
+    # Uno por template compilado: los de render_template y los que incluyen o extienden.
+    assert len(os.listdir(directorio)) == precompile(nueva) >= len(rendered_templates(nueva))
+    assert "index.html" in rendered_templates(nueva)
+
+
+def test_template_faltante_falla_al_arrancar(app, tmp_path, monkeypatch):
+    (tmp_path / "vistas_rotas.py").write_text(
+        "from flask import render_template\n\n\n"
+        "def vista():\n    return render_template('no_existe.html')\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "vistas_rotas", raising=False)
+    __import__("vistas_rotas")
+    app.register_blueprint(Blueprint("rotas", "vistas_rotas"))
+    with pytest.raises(TemplatesNotFound) as error:
+        precompile(app)
+    assert error.value.templates == ["no_existe.html"]